@@ -4,7 +4,231 @@ import json
 import time
 import re
 import os
+import argparse
+import hashlib
+import random
+import threading
+import queue
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from datetime import datetime
+from urllib.parse import urlsplit
+
+BASE_URL = "https://meankielensanakirja.com"
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+# Responses that are worth retrying after a pause
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+class ResponseCache:
+    """
+    On-disk cache of crawled URLs for conditional re-crawls.
+    Every URL has a small JSON file with the ETag and Last-Modified headers of
+    its last response, the SHA-256 of its body and the value parsed from it,
+    so an unchanged page is neither transferred again (304) nor re-parsed.
+    Files are replaced atomically and each URL has its own file, so worker
+    threads can use the cache concurrently.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, url):
+        name = hashlib.sha1(url.encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, name[:2], name + ".json")
+
+    def load(self, url):
+        """Return the cached entry of url, or None."""
+        try:
+            with open(self.path(url), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get('url') == url else None
+
+    def store(self, url, entry):
+        path = self.path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({'url': url, **entry}, f, ensure_ascii=False)
+        os.replace(temp_path, path)
+
+class TokenBucket:
+    """
+    Thread-safe token bucket: on average `rate` acquisitions per second, with
+    bursts of up to `burst` after idle periods.
+    """
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Take one token, sleeping until one is available."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+class Fetcher:
+    """
+    Concurrent HTTP fetcher for the crawl.
+    All requests share one pooled requests.Session, so connections are reused
+    instead of being set up for every page. A global token bucket keeps the
+    request rate within the budget (retries included), at most per_host requests
+    are in flight per host, and connection errors, timeouts, 429 and 5xx
+    responses are retried with exponential backoff, honouring Retry-After.
+    pool_size is the number of connections kept per host; it should cover every
+    thread requesting through the fetcher, including callers outside its own
+    workers. By default it covers the workers and the per-host slots.
+    """
+    def __init__(self, rate=1.0, burst=1, workers=4, per_host=4, retries=3, backoff=1.0, timeout=30,
+                 cache=None, pool_size=None):
+        self.bucket = TokenBucket(rate, burst)
+        self.cache = cache  # ResponseCache for conditional requests, or None
+        self.workers = workers
+        self.per_host = per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update(HEADERS)
+        # Connections beyond pool_maxsize are closed after each request instead of reused
+        if pool_size is None:
+            pool_size = max(per_host, workers)
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.host_semaphores = {}
+        self.lock = threading.Lock()
+        self.stats = Counter()
+
+    @contextmanager
+    def host_slot(self, host):
+        """Hold one of the per_host request slots of a host."""
+        with self.lock:
+            semaphore = self.host_semaphores.get(host)
+            if semaphore is None:
+                semaphore = self.host_semaphores[host] = threading.BoundedSemaphore(self.per_host)
+        with semaphore:
+            yield
+
+    def count(self, name):
+        """Increment a stats counter; the workers update them concurrently."""
+        with self.lock:
+            self.stats[name] += 1
+
+    def get(self, url, **kwargs):
+        """
+        GET url, retrying transient failures. Returns the last response, which may
+        still be an error status, or raises the last connection error.
+        """
+        host = urlsplit(url).netloc
+        for attempt in range(self.retries + 1):
+            response, error = None, None
+            with self.host_slot(host):
+                self.bucket.acquire()
+                self.count('requests')
+                try:
+                    response = self.session.get(url, timeout=self.timeout, **kwargs)
+                except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                    error = e
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                return response
+            if attempt == self.retries:
+                self.count('failures')
+                if response is not None:
+                    return response
+                raise error
+
+            # Exponential backoff with jitter, or what the server asks for
+            delay = self.backoff * 2 ** attempt * random.uniform(0.5, 1.5)
+            if response is not None:
+                retry_after = response.headers.get('Retry-After', "")
+                if retry_after.isdigit():
+                    delay = max(delay, int(retry_after))
+            reason = error if error is not None else f"HTTP {response.status_code}"
+            print(f"Retrying {url} in {delay:.1f} s ({reason})")
+            self.count('retries')
+            time.sleep(delay)
+
+    def get_parsed(self, url, parse):
+        """
+        GET url and return (parse(body), changed), raising HTTPError for error statuses.
+        With a response cache, the request is conditional on the cached ETag and
+        Last-Modified; when the server answers 304, or sends a body with the cached
+        hash, the cached parsed value is returned with changed false.
+        """
+        entry = self.cache.load(url) if self.cache is not None else None
+        headers = {}
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        response = self.get(url, headers=headers)
+        if response.status_code == 304 and entry is not None:
+            self.count('not_modified')
+            return entry['parsed'], False
+        response.raise_for_status()
+
+        digest = hashlib.sha256(response.content).hexdigest()
+        changed = entry is None or entry['sha256'] != digest
+        parsed = parse(response.content) if changed else entry['parsed']
+        self.count('changed' if changed else 'unchanged')
+        if self.cache is not None:
+            self.cache.store(url, {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'sha256': digest,
+                'parsed': parsed,
+            })
+        return parsed, changed
+
+    def map(self, func, items, ordered=True, executor=None):
+        """
+        Like map(func, items), running func on the worker threads (or those of
+        another executor), with only a few items per worker in flight. Results are
+        yielded in input order, or as soon as they are ready if ordered is false,
+        so one slow item doesn't hold back the others.
+        """
+        executor = executor or self.executor
+        pending = deque()
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= self.workers * 2:
+                if ordered:
+                    yield pending.popleft().result()
+                else:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.remove(future)
+                        yield future.result()
+        while pending:
+            yield pending.popleft().result()
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
 def analyze_dictionary_website():
     base_url = "https://meankielensanakirja.com"
@@ -82,31 +306,22 @@ def check_for_sitemap_or_data_dump():
         except requests.exceptions.RequestException as e:
             print(f"Error checking {url}: {e}")
 
-def extract_word_ids_from_page(page_num):
+def parse_word_ids(html):
+    """Return the word IDs linked from a browse page."""
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Look for word links
+    word_links = soup.find_all('a', href=re.compile(r"/sv/sana/id/\d+/"))
+    return [re.search(r"/sv/sana/id/(\d+)/", link['href']).group(1) for link in word_links]
+
+def extract_word_ids_from_page(page_num, fetcher, base_url=BASE_URL):
     print(f"DEBUG: Starting to extract word IDs from page {page_num}")
-    url = f"https://meankielensanakirja.com/sv/advanced?page={page_num}"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    word_ids = []
+    url = f"{base_url}/sv/advanced?page={page_num}"
     try:
         print(f"DEBUG: Fetching page {page_num}...")
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        print(f"DEBUG: Successfully fetched page {page_num}")
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        print(f"DEBUG: Parsed HTML for page {page_num}")
-        
-        # Look for word links
-        word_links = soup.find_all('a', href=re.compile(r"/sv/sana/id/\d+/"))
-        print(f"DEBUG: Found {len(word_links)} word links on page {page_num}")
-        
-        for link in word_links:
-            word_id = re.search(r"/sv/sana/id/(\d+)/", link['href']).group(1)
-            word_ids.append(word_id)
-        
-        print(f"Found {len(word_ids)} words on page {page_num}")
+        # Unchanged pages come from the response cache without being parsed again
+        word_ids, changed = fetcher.get_parsed(url, parse_word_ids)
+        print(f"Found {len(word_ids)} words on page {page_num}" + ("" if changed else " (unchanged)"))
         return word_ids
     except requests.exceptions.RequestException as e:
         print(f"Error accessing page {page_num}: {e}")
@@ -115,44 +330,119 @@ def extract_word_ids_from_page(page_num):
         print(f"Unexpected error on page {page_num}: {e}")
         return []
 
-def fetch_word_data(word_id):
+def fetch_word_data(word_id, fetcher, base_url=BASE_URL):
+    """Return (word data, changed since the cached copy), or (None, False) on errors."""
     print(f"DEBUG: Fetching data for word ID {word_id}")
-    url = f"https://meankielensanakirja.com/sv/api/{word_id}"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
+    url = f"{base_url}/sv/api/{word_id}"
     try:
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        return response.json()
+        return fetcher.get_parsed(url, json.loads)
     except requests.exceptions.RequestException as e:
         print(f"Error fetching word {word_id}: {e}")
-        return None
+        return None, False
     except Exception as e:
         print(f"Unexpected error fetching word {word_id}: {e}")
-        return None
+        return None, False
 
-def save_progress(dictionary_data, output_file):
-    print(f"DEBUG: Saving progress to {output_file}")
-    try:
-        with open(output_file, "w", encoding="utf-8") as f:
-            json.dump(dictionary_data, f, ensure_ascii=False, indent=2)
-        print(f"Progress saved to {output_file}")
-    except Exception as e:
-        print(f"Error saving progress: {e}")
+class CheckpointWriter:
+    """
+    Append-only JSONL checkpoint of fetched words, one {"id": ..., "data": ...} line each.
+    Lines are written as records arrive and fsynced in batches: after sync_every
+    records or sync_interval seconds, whichever comes first, and on close. A
+    system crash loses at most the unsynced batch, which is simply fetched again.
+    """
+    def __init__(self, path, sync_every=100, sync_interval=2.0):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.file = open(path, "ab")
+        # A crash may have left a torn last line; start on a fresh one
+        if self.file.tell() > 0:
+            with open(path, "rb") as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    self.file.write(b"\n")
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
 
-def collect_word_ids():
-    print("DEBUG: Starting collect_word_ids function")
-    word_ids_file = "word_ids.json"
-    
+    def write(self, word_id, word_data):
+        line = json.dumps({'id': word_id, 'data': word_data}, ensure_ascii=False)
+        self.file.write(line.encode("utf-8") + b"\n")
+        self.file.flush()  # Cheap, and a killed process then loses nothing
+        self.unsynced += 1
+        if self.unsynced >= self.sync_every or time.monotonic() - self.last_sync >= self.sync_interval:
+            self.sync()
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.unsynced = 0
+        self.last_sync = time.monotonic()
+
+    def close(self):
+        self.sync()
+        self.file.close()
+
+def read_checkpoint(path):
+    """Stream the records of a checkpoint file, skipping a torn or corrupt line."""
+    if not os.path.exists(path):
+        return
+    with open(path, "rb") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(record, dict) and 'id' in record:
+                yield record
+
+def iter_latest_checkpoint_records(path):
+    """
+    Stream the records of a checkpoint file, yielding each word once, with its
+    latest record; words checkpointed more than once, e.g. by a refresh, keep
+    the position of their last record.
+    """
+    # First pass: the position of each word's last record
+    latest = {}
+    for position, record in enumerate(read_checkpoint(path)):
+        latest[record['id']] = position
+    for position, record in enumerate(read_checkpoint(path)):
+        if latest[record['id']] == position:
+            yield record
+
+def export_checkpoint(checkpoint_file, output_file):
+    """
+    Write the words of a checkpoint as a JSON array to output_file, streaming
+    record by record. Words checkpointed more than once, e.g. by a refresh,
+    are written once, with their latest data. Returns the number of words written.
+    """
+    print(f"DEBUG: Exporting {checkpoint_file} to {output_file}")
+    with open(output_file, "w", encoding="utf-8") as f:
+        f.write("[")
+        written = 0
+        for record in iter_latest_checkpoint_records(checkpoint_file):
+            f.write(",\n" if written else "\n")
+            f.write(json.dumps(record['data'], ensure_ascii=False))
+            written += 1
+        f.write("\n]\n")
+    return written
+
+def iter_page_word_ids(fetcher, base_url=BASE_URL, total_pages=445, word_ids_file="word_ids.json",
+                       executor=None, refresh=False):
+    """
+    Yield the word IDs of each browse page as soon as the page is parsed.
+    The complete ID list is saved to word_ids_file, and a later run reads it
+    from there instead of fetching the pages again, unless refresh is set.
+    Pages are fetched on the fetcher's workers, or on executor if given.
+    """
     # Check if we already have word IDs
-    if os.path.exists(word_ids_file):
+    if not refresh and os.path.exists(word_ids_file):
         print(f"Found existing word IDs file: {word_ids_file}")
         try:
             with open(word_ids_file, "r") as f:
                 word_ids = json.load(f)
             print(f"Successfully loaded {len(word_ids)} word IDs from file")
-            return word_ids
+            yield word_ids
+            return
         except Exception as e:
             print(f"Error loading word IDs file: {e}")
             print("Will collect word IDs again")
@@ -160,75 +450,180 @@ def collect_word_ids():
     # If not, collect them
     print("No existing word IDs file found. Collecting word IDs...")
     all_word_ids = []
-    total_pages = 445
     
-    for page in range(1, total_pages + 1):
-        word_ids = extract_word_ids_from_page(page)
+    # Pages are fetched concurrently; the fetcher's rate limit keeps it nice to the server
+    pages = fetcher.map(lambda page: extract_word_ids_from_page(page, fetcher, base_url),
+                        range(1, total_pages + 1), executor=executor)
+    for page, word_ids in enumerate(pages, 1):
         all_word_ids.extend(word_ids)
-        time.sleep(1)  # Be nice to the server
-        
-        # Save progress every 10 pages
+        yield word_ids
         if page % 10 == 0:
             print(f"Progress: {page}/{total_pages} pages processed")
-            try:
-                with open(word_ids_file, "w") as f:
-                    json.dump(all_word_ids, f)
-                print(f"Saved {len(all_word_ids)} word IDs to file")
-            except Exception as e:
-                print(f"Error saving word IDs: {e}")
     
+    # Only a complete list is saved, since a saved list is taken as complete on the next run
+    try:
+        with open(word_ids_file + ".tmp", "w") as f:
+            json.dump(all_word_ids, f)
+        os.replace(word_ids_file + ".tmp", word_ids_file)
+        print(f"Saved {len(all_word_ids)} word IDs to file")
+    except Exception as e:
+        print(f"Error saving word IDs: {e}")
     print(f"\nFound {len(all_word_ids)} total word IDs")
+
+def collect_word_ids(fetcher, base_url=BASE_URL, total_pages=445, word_ids_file="word_ids.json"):
+    print("DEBUG: Starting collect_word_ids function")
+    all_word_ids = []
+    for word_ids in iter_page_word_ids(fetcher, base_url, total_pages, word_ids_file):
+        all_word_ids.extend(word_ids)
     return all_word_ids
 
+class StageMetrics:
+    """Throughput of one crawl stage, and the time it spent waiting on the queue between stages."""
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.waited = 0.0
+        self.started = time.monotonic()
+        self.finished = None
+
+    def elapsed(self):
+        return (self.finished or time.monotonic()) - self.started
+
+    def __str__(self):
+        elapsed = self.elapsed()
+        rate = self.items / elapsed if elapsed else 0
+        return (f"{self.name}: {self.items} in {elapsed:.1f} s ({rate:.1f}/s), "
+                f"{self.waited:.1f} s waiting on the queue")
+
+# Marks the end of the word ID queue
+END_OF_IDS = object()
+
+def crawl_words(fetcher, checkpoint, processed_ids, base_url=BASE_URL, total_pages=445,
+                queue_size=1000, page_workers=2, refresh=False):
+    """
+    Crawl the browse pages and the word API as a pipeline.
+    A producer thread parses the pages, fetched by page_workers threads of their
+    own, and puts every new word ID on a bounded queue, while the fetcher's
+    workers take IDs off it right away, so word data is fetched while pages are
+    still being collected. A full queue blocks the producer (backpressure); IDs
+    already checkpointed or seen before are dropped. Fetched words are appended
+    to checkpoint. Both stages share the fetcher's rate limit and host caps.
+    refresh re-crawls every page and word, checkpointed or not, and appends only
+    the words that changed, so with a response cache only the delta is
+    transferred and processed.
+    Returns the metrics of the ID and word stages.
+    """
+    ids_queue = queue.Queue(maxsize=queue_size)
+    id_stage = StageMetrics("word IDs")
+    word_stage = StageMetrics("words")
+    seen = set()
+
+    def produce():
+        try:
+            for word_ids in iter_page_word_ids(fetcher, base_url, total_pages,
+                                               executor=page_executor, refresh=refresh):
+                for word_id in word_ids:
+                    if (word_id in processed_ids and not refresh) or word_id in seen:
+                        continue
+                    seen.add(word_id)
+                    id_stage.items += 1
+                    waiting = time.monotonic()
+                    ids_queue.put(word_id)
+                    id_stage.waited += time.monotonic() - waiting
+        except Exception as e:
+            print(f"Error collecting word IDs: {e}")
+        finally:
+            id_stage.finished = time.monotonic()
+            ids_queue.put(END_OF_IDS)
+
+    def queued_ids():
+        while True:
+            waiting = time.monotonic()
+            word_id = ids_queue.get()
+            word_stage.waited += time.monotonic() - waiting
+            if word_id is END_OF_IDS:
+                return
+            yield word_id
+
+    page_executor = ThreadPoolExecutor(max_workers=page_workers)
+    producer = threading.Thread(target=produce, name="word-id-producer", daemon=True)
+    producer.start()
+    fetched = fetcher.map(lambda word_id: (word_id, *fetch_word_data(word_id, fetcher, base_url)),
+                          queued_ids(), ordered=False)
+    for word_id, word_data, changed in fetched:
+        word_stage.items += 1
+        print(f"Fetched data for word {word_stage.items} (ID: {word_id})" + ("" if changed else " (unchanged)"))
+        # Failed words aren't checkpointed, so the next run retries them; unchanged
+        # words are already in the checkpoint unless it was started afresh
+        if word_data and (changed or word_id not in processed_ids):
+            checkpoint.write(word_id, word_data)
+        if word_stage.items % 50 == 0:
+            print(f"Progress: {word_stage.items} words processed, {ids_queue.qsize()} queued; "
+                  f"{id_stage}; {word_stage}")
+    word_stage.finished = time.monotonic()
+    producer.join()
+    page_executor.shutdown()
+    return id_stage, word_stage
+
 def main():
+    parser = argparse.ArgumentParser(description="Crawl the dictionary website into a JSON file.")
+    parser.add_argument('--rate', type=float, default=1.0, help="requests per second (default: 1)")
+    parser.add_argument('--burst', type=int, default=1, help="requests allowed at once after idling")
+    parser.add_argument('--workers', type=int, default=4, help="concurrent requests")
+    parser.add_argument('--per-host', type=int, default=4, help="concurrent requests per host")
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--base-url', default=BASE_URL, help="site to crawl, e.g. a local test server")
+    parser.add_argument('--pages', type=int, default=445, help="number of browse pages")
+    parser.add_argument('--page-workers', type=int, default=2,
+                        help="concurrent browse page requests, besides the word requests")
+    parser.add_argument('--queue-size', type=int, default=1000,
+                        help="word IDs buffered between page parsing and word fetching")
+    parser.add_argument('--checkpoint', default="dictionary_data.jsonl",
+                        help="JSONL file fetched words are appended to; a rerun resumes from it")
+    parser.add_argument('--cache-dir', default="http_cache",
+                        help="directory of the response cache used for conditional requests")
+    parser.add_argument('--no-cache', action='store_true', help="don't use the response cache")
+    parser.add_argument('--refresh', action='store_true',
+                        help="re-crawl all pages and words, checkpointing only the changed ones")
+    args = parser.parse_args()
+
     print("DEBUG: Starting main function")
+    cache = None if args.no_cache else ResponseCache(args.cache_dir)
+    # crawl_words fetches result pages from its own page workers through the same session
+    pool_size = max(args.per_host, args.workers + args.page_workers)
+    fetcher = Fetcher(args.rate, args.burst, args.workers, args.per_host, args.retries, cache=cache,
+                      pool_size=pool_size)
     try:
         # Generate timestamp for the output file
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         output_file = f"dictionary_data_{timestamp}.json"
         print(f"DEBUG: Output file will be {output_file}")
         
-        # First, get all word IDs
-        word_ids = collect_word_ids()
-        print(f"DEBUG: Collected {len(word_ids)} word IDs")
+        # Get the IDs of words already in the checkpoint, without keeping their data
+        processed_ids = {record['id'] for record in read_checkpoint(args.checkpoint)}
+        print(f"DEBUG: Found {len(processed_ids)} already processed words in {args.checkpoint}")
         
-        # Load existing dictionary data if it exists
-        dictionary_data = []
-        if os.path.exists("dictionary_data.json"):
-            print("Found existing dictionary data file. Loading...")
-            try:
-                with open("dictionary_data.json", "r", encoding="utf-8") as f:
-                    dictionary_data = json.load(f)
-                print(f"Loaded {len(dictionary_data)} existing entries")
-            except Exception as e:
-                print(f"Error loading existing dictionary data: {e}")
-        
-        # Get the IDs of words we've already processed
-        processed_ids = {entry.get('id') for entry in dictionary_data if entry.get('id')}
-        print(f"DEBUG: Found {len(processed_ids)} already processed words")
-        
-        # Fetch data for each word that hasn't been processed yet
-        for i, word_id in enumerate(word_ids, 1):
-            if word_id in processed_ids:
-                print(f"Skipping already processed word {i}/{len(word_ids)} (ID: {word_id})...")
-                continue
-                
-            print(f"Fetching data for word {i}/{len(word_ids)} (ID: {word_id})...")
-            word_data = fetch_word_data(word_id)
-            if word_data:
-                dictionary_data.append(word_data)
-            time.sleep(1)  # Be nice to the server
-            
-            # Save progress every 50 words
-            if i % 50 == 0:
-                print(f"Progress: {i}/{len(word_ids)} words processed")
-                save_progress(dictionary_data, output_file)
+        # Fetch data for each word that hasn't been processed yet, while the IDs are collected
+        checkpoint = CheckpointWriter(args.checkpoint)
+        try:
+            stages = crawl_words(fetcher, checkpoint, processed_ids, args.base_url,
+                                 args.pages, args.queue_size, args.page_workers, args.refresh)
+        finally:
+            checkpoint.close()
+        for stage in stages:
+            print(stage)
         
-        # Final save
-        save_progress(dictionary_data, output_file)
-        print(f"\nDictionary data saved to {output_file}. Total entries: {len(dictionary_data)}")
+        # Write the complete data set as one JSON file
+        total = export_checkpoint(args.checkpoint, output_file)
+        print(f"\nDictionary data saved to {output_file}. Total entries: {total}")
+        print(f"Requests: {fetcher.stats['requests']}, retries: {fetcher.stats['retries']}, "
+              f"failures: {fetcher.stats['failures']}")
+        print(f"Responses: {fetcher.stats['changed']} new or changed, {fetcher.stats['not_modified']} "
+              f"not modified, {fetcher.stats['unchanged']} unchanged")
     except Exception as e:
         print(f"Unexpected error in main function: {e}")
+    finally:
+        fetcher.close()
 
 if __name__ == "__main__":
     print("DEBUG: Script started")
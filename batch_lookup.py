@@ -0,0 +1,80 @@
+import argparse
+import json
+import sys
+import time
+from itertools import islice
+from dictionary_lookup import Dictionary
+from dictionary_parallel import ParallelDictionary
+
+def read_words(stream):
+    """Yield the non-empty, stripped lines of a text stream."""
+    for line in stream:
+        word = line.strip()
+        if word:
+            yield word
+
+def lookup_stream(dictionary, words, output, direction, mode, batch_size=1000, fold_diacritics=False):
+    """
+    Look up words in batches and write one JSON line per word to output.
+    Only one batch is held in memory at a time.
+    Returns a dict of throughput statistics.
+    """
+    stats = {'words': 0, 'found': 0, 'results': 0}
+    start = time.perf_counter()
+
+    while True:
+        batch = list(islice(words, batch_size))
+        if not batch:
+            break
+
+        results = dictionary.search_many(batch, direction, mode, fold_diacritics)
+        for word in batch:
+            word_results = results[word]
+            output.write(json.dumps({'word': word, 'results': word_results}, ensure_ascii=False) + "\n")
+            stats['words'] += 1
+            stats['results'] += len(word_results)
+            if word_results:
+                stats['found'] += 1
+        output.flush()
+
+    stats['seconds'] = time.perf_counter() - start
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Translate a word list with the dictionary, writing JSON lines to stdout.")
+    parser.add_argument('input', nargs='?', help="file with one word per line (default: stdin)")
+    parser.add_argument('-d', '--direction', default="meänkieli-sv", choices=["meänkieli-sv", "sv-meänkieli"])
+    parser.add_argument('-m', '--mode', default="exact", choices=["exact", "partial", "examples"])
+    parser.add_argument('--fold-diacritics', action='store_true',
+                        help="ignore diacritics, so e.g. 'a' also matches 'ä'")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('-p', '--processes', type=int, default=1,
+                        help="number of worker processes (0: one per CPU)")
+    parser.add_argument('--xml', default="fit-swe-lr-trie.xml")
+    parser.add_argument('--lookup-js', default="lookup.js")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    dictionary = Dictionary(args.xml, args.lookup_js)
+    searcher = dictionary
+    if args.processes != 1:
+        searcher = ParallelDictionary(dictionary, args.processes or None)
+    print(f"Loaded dictionary in {time.perf_counter() - start:.2f} s", file=sys.stderr)
+
+    input_stream = open(args.input, 'r', encoding='utf-8') if args.input else sys.stdin
+    try:
+        stats = lookup_stream(searcher, read_words(input_stream), sys.stdout,
+                              args.direction, args.mode, args.batch_size, args.fold_diacritics)
+    finally:
+        if args.input:
+            input_stream.close()
+        if searcher is not dictionary:
+            searcher.close()
+
+    rate = stats['words'] / stats['seconds'] if stats['seconds'] else 0
+    print(f"Looked up {stats['words']} words ({stats['found']} found, {stats['results']} results) "
+          f"in {stats['seconds']:.2f} s: {rate:.0f} words/s", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
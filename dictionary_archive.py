@@ -0,0 +1,193 @@
+import argparse
+import json
+import marshal
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from split_json_files import iter_json_entries
+
+# Archive layout: header, length-prefixed zlib blocks of JSON lines, compressed index
+ARCHIVE_MAGIC = b"MKDATA"
+ARCHIVE_VERSION = 1
+# magic, format version, record count, index offset, index length
+ARCHIVE_HEADER = struct.Struct("<6sHQQQ")
+BLOCK_LENGTH = struct.Struct("<I")
+# Records are grouped into blocks of about this many bytes of JSON before compression;
+# bigger blocks compress better, smaller ones are quicker to fetch a single record from
+BLOCK_SIZE = 64 * 1024
+# Locations in the index encode (block number, record number in the block)
+BLOCK_ITEMS_LIMIT = 1 << 16
+
+def record_id(record, id_key):
+    """Return the ID of a record as a string, or None if it has none."""
+    if isinstance(record, dict) and record.get(id_key) is not None:
+        return str(record[id_key])
+    return None
+
+def iter_records(input_file, id_key):
+    """
+    Yield (ID, record) pairs from a JSON array file, as exported by the crawler
+    or written by split_json_files, or from a crawl checkpoint (.jsonl), whose
+    lines carry the word ID next to its data. Checkpoints are read as by
+    export_checkpoint: each word once, with its latest data.
+    """
+    if input_file.endswith(".jsonl"):
+        # Imported here, so reading archives doesn't need the crawler's dependencies
+        from analyze_dictionary import iter_latest_checkpoint_records
+        for record in iter_latest_checkpoint_records(input_file):
+            yield str(record['id']), record['data']
+    else:
+        for record in iter_json_entries(input_file):
+            yield record_id(record, id_key), record
+
+def convert(input_files, output_file, id_key='id'):
+    """
+    Convert scraped JSON or checkpoint files into an archive, streaming one
+    record at a time. Records are written in input order; an ID seen twice is
+    looked up as its last record. Returns the number of records written.
+    """
+    temp_file = output_file + ".tmp"
+    block_offsets = array('Q')
+    locations = array('Q')
+    ids = []
+    block = []
+    block_size = 0
+    count = 0
+
+    with open(temp_file, 'wb') as f:
+        f.write(ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, 0, 0, 0))
+
+        def flush_block():
+            nonlocal block, block_size
+            data = zlib.compress("\n".join(block).encode('utf-8'), 9)
+            block_offsets.append(f.tell())
+            f.write(BLOCK_LENGTH.pack(len(data)) + data)
+            block, block_size = [], 0
+
+        for input_file in input_files:
+            print(f"[INFO] Converting {input_file}...")
+            for word_id, record in iter_records(input_file, id_key):
+                line = json.dumps(record, ensure_ascii=False, separators=(',', ':'))
+                if word_id is not None:
+                    ids.append(word_id)
+                    locations.append(len(block_offsets) * BLOCK_ITEMS_LIMIT + len(block))
+                block.append(line)
+                block_size += len(line)
+                count += 1
+                if block_size >= BLOCK_SIZE or len(block) == BLOCK_ITEMS_LIMIT:
+                    flush_block()
+        if block:
+            flush_block()
+
+        index = zlib.compress(marshal.dumps((block_offsets.tobytes(), tuple(ids), locations.tobytes())))
+        index_offset = f.tell()
+        f.write(index)
+        f.seek(0)
+        f.write(ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, count, index_offset, len(index)))
+    os.replace(temp_file, output_file)
+    return count
+
+class ArchiveReader:
+    """
+    Reads records from an archive written by convert().
+    Opening reads only the header and the index; get() fetches one record with
+    a single seek and the decompression of its block, and iterating streams
+    all records a block at a time.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        magic, version, self.count, index_offset, index_length = ARCHIVE_HEADER.unpack(
+            self.file.read(ARCHIVE_HEADER.size))
+        if magic != ARCHIVE_MAGIC or version != ARCHIVE_VERSION:
+            raise ValueError(f"{path} is not a version {ARCHIVE_VERSION} dictionary archive")
+        self.file.seek(index_offset)
+        offsets, ids, locations = marshal.loads(zlib.decompress(self.file.read(index_length)))
+        self.block_offsets = array('Q', offsets)
+        self.locations = dict(zip(ids, array('Q', locations)))
+        self.cached_block = (None, None)  # last (block number, lines) read, for neighbouring lookups
+
+    def read_block(self, block_number):
+        """Return the JSON lines of a block."""
+        if self.cached_block[0] == block_number:
+            return self.cached_block[1]
+        self.file.seek(self.block_offsets[block_number])
+        length, = BLOCK_LENGTH.unpack(self.file.read(BLOCK_LENGTH.size))
+        lines = zlib.decompress(self.file.read(length)).decode('utf-8').split("\n")
+        self.cached_block = (block_number, lines)
+        return lines
+
+    def get(self, word_id, default=None):
+        """Return the record with an ID, or default."""
+        location = self.locations.get(str(word_id))
+        if location is None:
+            return default
+        block_number, item = divmod(location, BLOCK_ITEMS_LIMIT)
+        return json.loads(self.read_block(block_number)[item])
+
+    def ids(self):
+        return self.locations.keys()
+
+    def __contains__(self, word_id):
+        return str(word_id) in self.locations
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        """Yield all records in archive order."""
+        for block_number in range(len(self.block_offsets)):
+            for line in self.read_block(block_number):
+                yield json.loads(line)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convert scraped dictionary JSON into a compact archive with an ID index, and read it.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    convert_parser = commands.add_parser('convert', help="convert JSON files into an archive")
+    convert_parser.add_argument('output', help="archive file to write")
+    convert_parser.add_argument('inputs', nargs='+',
+                                help="JSON files, e.g. dictionary_data_*_part*.json, or a crawl checkpoint (.jsonl)")
+    convert_parser.add_argument('--id-key', default='id', help="record field used as the lookup ID")
+    get_parser = commands.add_parser('get', help="print the records with the given IDs")
+    get_parser.add_argument('archive')
+    get_parser.add_argument('ids', nargs='+')
+    dump_parser = commands.add_parser('dump', help="print all records as JSON lines")
+    dump_parser.add_argument('archive')
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        start = time.perf_counter()
+        count = convert(args.inputs, args.output, args.id_key)
+        input_size = sum(os.path.getsize(path) for path in args.inputs)
+        output_size = os.path.getsize(args.output)
+        print(f"[INFO] Wrote {count} records to {args.output} in {time.perf_counter() - start:.1f} s: "
+              f"{input_size / 1024 / 1024:.1f} MB -> {output_size / 1024 / 1024:.1f} MB")
+        return
+
+    with ArchiveReader(args.archive) as reader:
+        if args.command == 'get':
+            for word_id in args.ids:
+                record = reader.get(word_id)
+                if record is None:
+                    print(f"No record with ID {word_id}", file=sys.stderr)
+                else:
+                    print(json.dumps(record, ensure_ascii=False, indent=2))
+        else:
+            for record in reader:
+                print(json.dumps(record, ensure_ascii=False))
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox
-from dictionary_lookup import Dictionary
+from concurrent.futures import ThreadPoolExecutor
+from dictionary_lookup import Dictionary, SearchSession
 import logging
 
 # Set up logging to only show errors and warnings
@@ -109,14 +110,30 @@ class DictionaryGUI:
         self.search_entry = ttk.Entry(self.search_frame, textvariable=self.search_var, width=30)
         self.search_entry.grid(row=0, column=1, padx=5)
         
+        # Diacritic-insensitive search, so e.g. "a" also matches "ä"
+        self.fold_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.search_frame, text="Ignore diacritics", variable=self.fold_var,
+                        command=self.perform_search).grid(row=0, column=2, padx=5)
+        
         # Add Entry button
         self.add_button = ttk.Button(self.search_frame, text="Add Entry", command=self.show_add_dialog)
-        self.add_button.grid(row=0, column=2, padx=5)
+        self.add_button.grid(row=0, column=3, padx=5)
+        
+        # Match counts, shown as soon as a search finishes
+        self.status_var = tk.StringVar()
+        ttk.Label(self.search_frame, textvariable=self.status_var).grid(row=0, column=4, padx=5)
         
         # Results text area
         self.results_text = scrolledtext.ScrolledText(self.main_frame, wrap=tk.WORD, width=100, height=40)
         self.results_text.grid(row=1, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
+        # Results are rendered a page at a time, the next page once the view nears the end
+        self.results_text.configure(yscrollcommand=self.on_results_scroll)
+        self.result_items = []  # headers and results of the current search
+        self.rendered_count = 0
+        self.render_id = None
+        self.page_size = 50
+        
         # Configure grid weights
         self.root.columnconfigure(0, weight=1)
         self.root.rowconfigure(0, weight=1)
@@ -128,12 +145,31 @@ class DictionaryGUI:
         self.debounce_id = None
         self.debounce_delay = 300  # milliseconds
         
+        # Searches run on a worker thread; only results of the latest generation are shown
+        self.search_executor = ThreadPoolExecutor(max_workers=1)
+        self.search_future = None
+        self.search_generation = 0
+        self.poll_delay = 20  # milliseconds
+        # Narrows the previous matches while the user keeps typing; only used on the worker thread
+        self.search_session = SearchSession(self.dictionary)
+        
         # Bind KeyRelease event to search entry for live search
         self.search_entry.bind('<KeyRelease>', self.on_key_release)
         
+        # Fold added entries into the XML file when the window is closed
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
         # Set focus to search entry
         self.search_entry.focus()
 
+    def on_close(self):
+        """Compact the journal of added entries into the dictionary and close."""
+        self.search_executor.shutdown(wait=True, cancel_futures=True)
+        if not self.dictionary.compact():
+            messagebox.showwarning("Warning", "Could not write added entries to the dictionary file. "
+                                              "They are kept in the journal and applied on next start.")
+        self.root.destroy()
+
     def show_add_dialog(self):
         """Show the dialog for adding a new entry."""
         AddEntryDialog(self.root, self.dictionary)
@@ -172,46 +208,95 @@ class DictionaryGUI:
         self.debounce_id = self.root.after(self.debounce_delay, self.perform_search)
 
     def perform_search(self):
+        """Start a search for the current word on the worker thread."""
         word = self.search_var.get().strip()
+        
+        # Any search still queued or running is for an outdated word
+        self.search_generation += 1
+        if self.search_future is not None:
+            self.search_future.cancel()
+            self.search_future = None
+        
         if not word:
-            self.results_text.delete(1.0, tk.END)
+            self.clear_results()
             return
         
-        # Clear previous results
+        # Always search exact matches in both directions, and partial matches
+        # if the word is 4 or more characters; entries already found exactly
+        # are not repeated as partial matches
+        modes = ("exact", "partial") if len(word) >= 4 else ("exact",)
+        self.search_future = self.search_executor.submit(self.dictionary.query, word, modes,
+                                                        session=self.search_session,
+                                                        fold_diacritics=self.fold_var.get())
+        self.root.after(self.poll_delay, self.poll_search, self.search_future, self.search_generation)
+
+    def poll_search(self, future, generation):
+        """Show the results of a finished search on the Tk thread, unless a newer one started."""
+        if generation != self.search_generation:
+            return
+        if not future.done():
+            self.root.after(self.poll_delay, self.poll_search, future, generation)
+            return
+        
+        self.search_future = None
+        try:
+            results = future.result()
+        except Exception as e:
+            logger.error(f"Search failed: {str(e)}")
+            self.clear_results()
+            self.results_text.insert(tk.END, "Search failed.\n")
+            return
+        self.show_results(results)
+
+    def clear_results(self):
+        """Empty the results pane and forget results that are still to be rendered."""
+        if self.render_id is not None:
+            self.root.after_cancel(self.render_id)
+            self.render_id = None
+        self.result_items = []
+        self.rendered_count = 0
+        self.status_var.set("")
         self.results_text.delete(1.0, tk.END)
+
+    def show_results(self, results):
+        """Display the tagged results of Dictionary.query, starting with the first page."""
+        exact_results = [r for r in results if r['match'] == "exact"]
+        partial_results = [r for r in results if r['match'] == "partial"]
         
-        # Always search exact matches in both directions
-        meankieli_to_sv_exact = self.dictionary.search_word_exact(word, "meänkieli-sv")
-        sv_to_meankieli_exact = self.dictionary.search_word_exact(word, "sv-meänkieli")
-        exact_results = meankieli_to_sv_exact + sv_to_meankieli_exact
-        
-        # If word is 4 or more characters, also search partial matches
-        partial_results = []
-        if len(word) >= 4:
-            meankieli_to_sv_partial = self.dictionary.search_word_partial(word, "meänkieli-sv")
-            sv_to_meankieli_partial = self.dictionary.search_word_partial(word, "sv-meänkieli")
-            partial_results = meankieli_to_sv_partial + sv_to_meankieli_partial
-            
-            # Remove partial results that are already in exact results
-            exact_word_pairs = {tuple(sorted([r['source'].lower(), r['target'].lower()])) for r in exact_results}
-            partial_results = [r for r in partial_results 
-                             if tuple(sorted([r['source'].lower(), r['target'].lower()])) not in exact_word_pairs]
-        
-        # Display results
+        # Clear previous results
+        self.clear_results()
+        self.status_var.set(f"{len(exact_results)} exact, {len(partial_results)} partial matches")
+        
+        # Queue headers and results in display order
         if exact_results:
-            self.results_text.insert(tk.END, f"Found {len(exact_results)} exact matches:\n\n")
-            for result in exact_results:
-                self.results_text.insert(tk.END, self.format_result(result))
+            self.result_items.append(f"Found {len(exact_results)} exact matches:\n\n")
+            self.result_items.extend(exact_results)
         
         if partial_results:
             if exact_results:
-                self.results_text.insert(tk.END, "\n" + "="*50 + "\n\n")
-            self.results_text.insert(tk.END, f"Found {len(partial_results)} partial matches:\n\n")
-            for result in partial_results:
-                self.results_text.insert(tk.END, self.format_result(result))
+                self.result_items.append("\n" + "="*50 + "\n\n")
+            self.result_items.append(f"Found {len(partial_results)} partial matches:\n\n")
+            self.result_items.extend(partial_results)
         
         if not exact_results and not partial_results:
-            self.results_text.insert(tk.END, "No matches found.\n")
+            self.result_items.append("No matches found.\n")
+        
+        self.render_next_page()
+
+    def render_next_page(self):
+        """Insert the next page of queued results with a single insert call."""
+        self.render_id = None
+        page = self.result_items[self.rendered_count:self.rendered_count + self.page_size]
+        self.rendered_count += len(page)
+        text = "".join(item if isinstance(item, str) else self.format_result(item) for item in page)
+        self.results_text.insert(tk.END, text)
+
+    def on_results_scroll(self, first, last):
+        """Update the scrollbar and render more results once the end comes into view."""
+        self.results_text.vbar.set(first, last)
+        more = self.rendered_count < len(self.result_items)
+        if more and float(last) > 0.9 and self.render_id is None:
+            self.render_id = self.root.after_idle(self.render_next_page)
 
 def main():
     root = tk.Tk()
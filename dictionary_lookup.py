@@ -1,13 +1,27 @@
 import xml.etree.ElementTree as ET
-import pandas as pd
 import json
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple
 import logging
 from dataclasses import dataclass
 from pathlib import Path
 import shutil
 from datetime import datetime
 import os
+import sys
+import hashlib
+import marshal
+import mmap
+import struct
+import re
+import unicodedata
+import heapq
+import math
+from array import array
+from bisect import bisect_left, insort
+from itertools import chain
+from operator import attrgetter
+from collections import Counter, OrderedDict
+import threading
 
 # Set up logging
 logging.basicConfig(
@@ -16,6 +30,115 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def normalize(text: str) -> str:
+    """
+    Return text casefolded and in Unicode NFC, the form every index key and query
+    is compared in, so e.g. composed and decomposed "ä" are the same letter.
+    """
+    if text.isascii():
+        return text.lower()
+    return unicodedata.normalize("NFC", text.casefold())
+
+def strip_diacritics(text: str) -> str:
+    """Remove the combining marks of normalized text, e.g. "ä" -> "a"; unchanged text is returned as is."""
+    if text.isascii():
+        return text
+    stripped = "".join(char for char in unicodedata.normalize("NFD", text)
+                       if not unicodedata.combining(char))
+    stripped = unicodedata.normalize("NFC", stripped)
+    return text if stripped == text else stripped
+
+def search_key(text: str, fold_diacritics: bool = False) -> str:
+    """Return the normalized form of text, with diacritics folded if requested."""
+    key = normalize(text)
+    return strip_diacritics(key) if fold_diacritics else key
+
+# Separators used between alternative Swedish translations in a "t:" attribute
+TRANSLATION_SEPARATORS = [',', '.', '/', ';', '|', '•', '·']
+
+def split_translation(swedish: str) -> List[str]:
+    """Split a Swedish translation into its lowercased alternatives."""
+    target_parts = [swedish]
+    for sep in TRANSLATION_SEPARATORS:
+        new_parts = []
+        for part in target_parts:
+            new_parts.extend(part.split(sep))
+        target_parts = [p.strip().lower() for p in new_parts if p.strip()]
+    return target_parts
+
+# Journal of added entries that haven't been compacted into the XML file yet
+JOURNAL_SUFFIX = ".journal"
+
+# On-disk index cache written next to the XML file
+INDEX_CACHE_SUFFIX = ".idx"
+INDEX_CACHE_MAGIC = b"MKIDX"
+INDEX_CACHE_VERSION = 6
+# magic, format version, XML size, XML mtime (ns), XML SHA-1, manifest offset and length
+INDEX_CACHE_HEADER = struct.Struct("<5sHQq20sQQ")
+
+def hash_file(path: str) -> bytes:
+    """Return the SHA-1 digest of a file's contents."""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+# Substring search indexes every character trigram of the padded text
+NGRAM_SIZE = 3
+NGRAM_PAD = "\0"
+
+def ngrams(text: str) -> set:
+    """Return the trigrams of text, padded at both ends so every character is covered."""
+    padded = f"{NGRAM_PAD}{text}{NGRAM_PAD}"
+    return {padded[i:i + NGRAM_SIZE] for i in range(len(padded) - NGRAM_SIZE + 1)}
+
+def intersect_postings(postings: List[List[int]]) -> List[int]:
+    """Intersect ascending posting lists, probing the longer lists by binary search."""
+    postings = sorted(postings, key=len)
+    result = postings[0]
+    for other in postings[1:]:
+        matches = []
+        for entry_id in result:
+            i = bisect_left(other, entry_id)
+            if i < len(other) and other[i] == entry_id:
+                matches.append(entry_id)
+        result = matches
+    return result
+
+def clip_postings(entry_ids, start: int = 0, stop: Optional[int] = None) -> List[int]:
+    """Return the part of an ascending id list that lies in range(start, stop)."""
+    if stop is None:
+        return list(entry_ids[bisect_left(entry_ids, start):])
+    return list(entry_ids[bisect_left(entry_ids, start):bisect_left(entry_ids, stop)])
+
+# Example sentences are indexed by word token; postings in the example indexes
+# encode (entry id, token position) as entry_id * EXAMPLE_POSITION_LIMIT + position
+EXAMPLE_TOKEN = re.compile(r"\w+")
+EXAMPLE_POSITION_LIMIT = 1 << 16
+
+def tokenize_example(text: str) -> List[str]:
+    """Split an example sentence into normalized word tokens."""
+    return EXAMPLE_TOKEN.findall(normalize(text))
+
+def parse_example_query(query: str) -> List[List[str]]:
+    """
+    Split an example query into terms, each a list of tokens.
+    Double-quoted parts are phrases; every other word is a term of its own.
+    """
+    terms = []
+    for phrase, word in re.findall(r'"([^"]*)"|(\S+)', query):
+        if phrase:
+            tokens = tokenize_example(phrase)
+            if tokens:
+                terms.append(tokens)
+        else:
+            terms.extend([token] for token in tokenize_example(word))
+    return terms
+
+# Part of speech codes used in the <s n="..."> tags of the <l> element
+POS_CODES = ['s', 'a', 'adv', 'v', 'en', 'pos', 'pron', 'num', 'konj', 'ij', 'prep']
+
 @dataclass
 class Translation:
     word: str
@@ -23,14 +146,350 @@ class Translation:
     examples: List[str] = None
     notes: str = None
 
+class Entry:
+    """
+    A single Meänkieli/Swedish translation flattened out of the trie XML.
+    One entry is stored per <l>/<r> pair of a <w> element; POS codes are
+    interned and examples are kept as tuples, so entries are cheap to hold
+    and never change after loading.
+    The normalized search keys are computed once when the entry is created and
+    stored in the index cache with it; folded keys without diacritics share the
+    normalized string when there is nothing to fold.
+    """
+    __slots__ = ('headword', 'meankieli', 'swedish', 'pos', 'notes',
+                 'meankieli_examples', 'swedish_examples',
+                 'translation_key', 'folded_headword', 'folded_translation')
+
+    def __init__(self, headword: str, meankieli: str, swedish: str, pos: str,
+                 notes: Optional[str], meankieli_examples: Tuple[str, ...],
+                 swedish_examples: Tuple[str, ...], translation_key: Optional[str] = None,
+                 folded_headword: Optional[str] = None, folded_translation: Optional[str] = None):
+        self.headword = headword  # normalized "v" attribute of the <w> element
+        self.meankieli = meankieli
+        self.swedish = swedish
+        self.pos = pos  # POS code, e.g. "s" or "adv"
+        self.notes = notes
+        self.meankieli_examples = meankieli_examples
+        self.swedish_examples = swedish_examples
+        if translation_key is None:
+            translation_key = normalize(swedish)
+        self.translation_key = translation_key
+        self.folded_headword = strip_diacritics(headword) if folded_headword is None else folded_headword
+        self.folded_translation = (strip_diacritics(translation_key) if folded_translation is None
+                                   else folded_translation)
+
+    def astuple(self) -> tuple:
+        """Return the entry fields in __slots__ order, e.g. for serialization."""
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+class EntryTable:
+    """
+    Sequence of entries backed by the memory-mapped index cache.
+    Records are unmarshalled on first access and kept afterwards; entries
+    appended later only live in memory.
+    """
+    def __init__(self, records: memoryview, offsets: memoryview):
+        self.records = records  # marshalled records, record i is records[offsets[i]:offsets[i + 1]]
+        self.offsets = offsets  # uint64 array with one offset per record plus the end
+        self.decoded = [None] * (len(offsets) - 1)
+        self.pending = len(self.decoded)
+
+    @staticmethod
+    def to_cache(entries) -> Tuple[bytes, bytes]:
+        """Serialize entries into (records, offsets) sections for the index cache."""
+        records = [marshal.dumps(entry.astuple()) for entry in entries]
+        offsets = array('Q', [0])
+        for record in records:
+            offsets.append(offsets[-1] + len(record))
+        return b"".join(records), offsets.tobytes()
+
+    def __len__(self) -> int:
+        return len(self.decoded)
+
+    def __getitem__(self, entry_id: int) -> Entry:
+        entry = self.decoded[entry_id]
+        if entry is None:
+            start, end = self.offsets[entry_id], self.offsets[entry_id + 1]
+            entry = Entry(*marshal.loads(self.records[start:end]))
+            self.decoded[entry_id] = entry
+            self.pending -= 1
+        return entry
+
+    def __iter__(self):
+        if not self.pending:
+            return iter(self.decoded)
+        return (self[entry_id] for entry_id in range(len(self.decoded)))
+
+    def append(self, entry: Entry):
+        self.decoded.append(entry)
+
+class PostingIndex:
+    """
+    Inverted index mapping string keys to ascending lists of entry ids.
+    An index loaded from the index cache keeps its posting lists in the
+    memory-mapped file; ids added afterwards are kept in memory on top of them.
+    item_format is the array type code of the stored ids; positional indexes
+    use 'Q' to hold encoded (entry id, position) pairs.
+    """
+    def __init__(self, item_format: str = 'I'):
+        self.item_format = item_format
+        self.slots = {}  # key -> position of its posting list in the mapped arrays
+        self.offsets = None  # uint64 array, posting list i is ids[offsets[i]:offsets[i + 1]]
+        self.ids = None  # array of the concatenated posting lists
+        self.added = {}  # key -> ids added in memory
+        self.sorted_keys = None  # all keys in sorted order, built on first prefix lookup
+
+    @classmethod
+    def from_cache(cls, keys: Tuple[str, ...], offsets: memoryview, ids: memoryview,
+                   item_format: str = 'I') -> 'PostingIndex':
+        """Wrap the sections written by to_cache without copying the posting lists."""
+        index = cls(item_format)
+        index.slots = dict(zip(keys, range(len(keys))))
+        index.offsets = offsets
+        index.ids = ids
+        index.sorted_keys = list(keys)
+        return index
+
+    def to_cache(self) -> Tuple[bytes, bytes, bytes]:
+        """Serialize the index into (sorted keys, offsets, ids) sections for the index cache."""
+        keys = sorted(self.keys())
+        offsets = array('Q', [0])
+        ids = array(self.item_format)
+        for key in keys:
+            ids.extend(self.get(key))
+            offsets.append(len(ids))
+        return marshal.dumps(tuple(keys)), offsets.tobytes(), ids.tobytes()
+
+    def add(self, key: str, entry_id: int):
+        if self.sorted_keys is not None and key not in self:
+            insort(self.sorted_keys, key)
+        self.added.setdefault(key, []).append(entry_id)
+
+    def get(self, key: str) -> List[int]:
+        """Return the ids of the entries stored under key, in ascending order."""
+        slot = self.slots.get(key)
+        if slot is None:
+            ids = []
+        else:
+            ids = self.ids[self.offsets[slot]:self.offsets[slot + 1]].tolist()
+        added = self.added.get(key)
+        return ids + added if added else ids
+
+    def prefix_keys(self, prefix: str, limit: Optional[int] = None) -> List[str]:
+        """Return the keys starting with prefix in sorted order, at most limit of them."""
+        if self.sorted_keys is None:
+            self.sorted_keys = sorted(self.keys())
+        keys = self.sorted_keys
+        matches = []
+        i = bisect_left(keys, prefix)
+        while i < len(keys) and keys[i].startswith(prefix):
+            if limit is not None and len(matches) >= limit:
+                break
+            matches.append(keys[i])
+            i += 1
+        return matches
+
+    def fuzzy_keys(self, word: str, max_distance: int) -> List[Tuple[int, str]]:
+        """
+        Return (edit distance, key) for the keys within max_distance of word, in key order.
+        The sorted keys are walked as a trie, computing one Levenshtein row per trie
+        node; keys sharing a prefix reuse its rows, and every key below a prefix
+        whose row exceeds max_distance is skipped with a binary search.
+        """
+        if self.sorted_keys is None:
+            self.sorted_keys = sorted(self.keys())
+        keys = self.sorted_keys
+        word_chars = list(enumerate(word))
+        rows = [list(range(len(word) + 1))]  # rows[k] belongs to the first k characters of prefix
+        prefix = ""
+        matches = []
+        i = 0
+        while i < len(keys):
+            key = keys[i]
+            common = 0
+            while common < len(prefix) and common < len(key) and prefix[common] == key[common]:
+                common += 1
+            del rows[common + 1:]
+            prefix = key[:common]
+
+            pruned = False
+            for char in key[common:]:
+                previous = rows[-1]
+                cost = previous[0] + 1
+                row = [cost]
+                lowest = cost
+                for j, word_char in word_chars:
+                    # Cheapest of insertion, deletion and substitution, without min() calls
+                    cost += 1
+                    if previous[j + 1] < cost:
+                        cost = previous[j + 1] + 1
+                    if word_char == char:
+                        if previous[j] < cost:
+                            cost = previous[j]
+                    elif previous[j] + 1 < cost:
+                        cost = previous[j] + 1
+                    row.append(cost)
+                    if cost < lowest:
+                        lowest = cost
+                rows.append(row)
+                prefix += char
+                if lowest > max_distance:
+                    pruned = True
+                    break
+
+            if pruned:
+                # No key extending this prefix can come within max_distance
+                i = bisect_left(keys, prefix[:-1] + chr(ord(prefix[-1]) + 1), i + 1)
+                continue
+            if rows[-1][-1] <= max_distance:
+                matches.append((rows[-1][-1], key))
+            i += 1
+        return matches
+
+    def keys(self):
+        if not self.added:
+            return self.slots.keys()
+        return self.slots.keys() | self.added.keys()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.slots or key in self.added
+
+    def __len__(self) -> int:
+        return len(self.keys())
+
+class QueryCache:
+    """
+    Bounded LRU cache of search results, mapping (normalized word, direction, mode,
+    fold_diacritics) keys to tuples of matching entry ids.
+    At most max_entries keys are kept and their estimated size stays within
+    max_bytes; the least recently used keys are evicted first. The cache is
+    shared by the GUI's search thread and the main thread, so access is locked.
+    data_version is bumped by every invalidation, so a search that ran while
+    entries were added can tell its result may be stale and not store it.
+    """
+    def __init__(self, max_entries: int = 1024, max_bytes: int = 32 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.items = OrderedDict()  # key -> (entry ids, estimated size in bytes)
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.data_version = 0
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def estimate_size(key: tuple, entry_ids: Tuple[int, ...]) -> int:
+        """Estimate the memory held by a cached item: the tuple, its ints and the word."""
+        return sys.getsizeof(entry_ids) + 28 * len(entry_ids) + sys.getsizeof(key[0])
+
+    def get(self, key: tuple) -> Optional[Tuple[int, ...]]:
+        """Return the cached ids for key and mark it as recently used, or None."""
+        with self.lock:
+            item = self.items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self.items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, key: tuple, entry_ids: Tuple[int, ...], data_version: Optional[int] = None):
+        """
+        Store the ids for key, evicting least recently used keys to stay within the limits.
+        data_version: the data_version read before the ids were computed; nothing
+        is stored if the cache has been invalidated since
+        """
+        size = self.estimate_size(key, entry_ids)
+        with self.lock:
+            if data_version is not None and data_version != self.data_version:
+                return
+            if size > self.max_bytes or self.max_entries <= 0:
+                return
+            old = self.items.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self.items[key] = (entry_ids, size)
+            self.bytes += size
+            while len(self.items) > self.max_entries or self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self.items.popitem(last=False)
+                self.bytes -= evicted_size
+                self.evictions += 1
+
+    def invalidate(self, stale) -> int:
+        """Drop every key for which stale(key) is true and return how many were dropped."""
+        with self.lock:
+            self.data_version += 1
+            keys = [key for key in self.items if stale(key)]
+            for key in keys:
+                self.bytes -= self.items.pop(key)[1]
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def clear(self):
+        """Drop all cached keys, keeping the counters."""
+        with self.lock:
+            self.data_version += 1
+            self.items.clear()
+            self.bytes = 0
+
+    def stats(self) -> Dict:
+        """Return the hit, miss, eviction and invalidation counters and the current size."""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'entries': len(self.items),
+                'bytes': self.bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+            }
+
+    def __len__(self) -> int:
+        return len(self.items)
+
 class Dictionary:
-    def __init__(self, xml_path: str, lookup_js_path: str):
-        """Initialize the dictionary with the XML file and lookup.js metadata."""
+    # PostingIndex attributes that are stored in the index cache, with their item format
+    index_formats = {
+        'headword_index': 'I',
+        'translation_index': 'I',
+        'folded_headword_index': 'I',
+        'folded_translation_index': 'I',
+        'headword_ngram_index': 'I',
+        'translation_ngram_index': 'I',
+        'meankieli_example_index': 'Q',
+        'swedish_example_index': 'Q',
+        'folded_meankieli_example_index': 'Q',
+        'folded_swedish_example_index': 'Q',
+    }
+
+    def __init__(self, xml_path: str, lookup_js_path: str, streaming: bool = True,
+                 use_cache: bool = True, query_cache_size: int = 1024,
+                 query_cache_bytes: int = 32 * 1024 * 1024):
+        """
+        Initialize the dictionary with the XML file and lookup.js metadata.
+        streaming: parse the XML incrementally instead of building the whole DOM first
+        use_cache: load the indexes from the on-disk cache next to the XML when it is
+        up to date, and write it after parsing otherwise
+        query_cache_size, query_cache_bytes: limits of the LRU cache of search
+        results (number of distinct searches and estimated bytes); 0 disables it
+        """
         self.xml_path = xml_path
         self.lookup_js_path = lookup_js_path
-        self.tree = None
-        self.root = None
+        self.streaming = streaming
+        self.use_cache = use_cache
+        self.cache_path = xml_path + INDEX_CACHE_SUFFIX
+        self.journal_path = xml_path + JOURNAL_SUFFIX
+        self.journal_records = []  # journal records replayed or added by this instance
         self.metadata = {}
+        self.entries = []
+        self.query_cache = QueryCache(query_cache_size, query_cache_bytes)
+        self.reset_indexes()
         self.load_dictionary()
         self.load_metadata()
 
@@ -45,62 +504,491 @@ class Dictionary:
         shutil.copy2(self.xml_path, backup_path)
         logger.info(f"Created backup at {backup_path}")
 
+    def build_word_element(self, meankieli: str, swedish: str, pos: str, user: str) -> ET.Element:
+        """Create the <w> element for a user-added entry."""
+        # Create new word element
+        word_elem = ET.Element("w")
+        word_elem.set("v", meankieli.lower())
+
+        # Create left element (Meänkieli)
+        l_elem = ET.SubElement(word_elem, "l")
+        l_elem.text = meankieli
+
+        # Add part of speech
+        s_elem = ET.SubElement(l_elem, "s")
+        s_elem.set("n", pos)
+
+        # Add user note
+        note_elem = ET.SubElement(l_elem, "s")
+        note_elem.set("n", f"note:Added by {user}")
+
+        # Create right element (Swedish)
+        r_elem = ET.SubElement(word_elem, "r")
+        s_elem = ET.SubElement(r_elem, "s")
+        s_elem.set("n", f"t:{swedish}")
+
+        return word_elem
+
     def add_entry(self, meankieli: str, swedish: str, pos: str, user: str) -> bool:
         """
         Add a new entry to the dictionary.
+        The entry is appended to the journal and synced to disk before it is added
+        to the in-memory indexes; compact() later folds the journal into the XML.
         Returns True if successful, False otherwise.
         """
         try:
-            # Create backup before modifying
-            self.create_backup()
-            
-            # Create new word element
-            word_elem = ET.Element("w")
-            word_elem.set("v", meankieli.lower())
-            
-            # Create left element (Meänkieli)
-            l_elem = ET.SubElement(word_elem, "l")
-            l_elem.text = meankieli
-            
-            # Add part of speech
-            s_elem = ET.SubElement(l_elem, "s")
-            s_elem.set("n", pos)
-            
-            # Add user note
-            note_elem = ET.SubElement(l_elem, "s")
-            note_elem.set("n", f"note:Added by {user}")
-            
-            # Create right element (Swedish)
-            r_elem = ET.SubElement(word_elem, "r")
-            s_elem = ET.SubElement(r_elem, "s")
-            s_elem.set("n", f"t:{swedish}")
-            
-            # Add to root
-            self.root.append(word_elem)
-            
-            # Save changes
-            self.tree.write(self.xml_path, encoding='utf-8', xml_declaration=True)
-            
-            # Reload dictionary to update in-memory state
-            self.load_dictionary()
-            
+            record = self.journal_record(meankieli, swedish, pos, user)
+            self.append_to_journal(record)
+
+            # Update in-memory state the same way loading the compacted XML would
+            self.index_word_element(self.build_word_element(meankieli, swedish, pos, user))
+            self.journal_records.append(record)
+
             return True
-            
+
         except Exception as e:
             logger.error(f"Error adding entry: {str(e)}")
             return False
 
+    @staticmethod
+    def journal_record(meankieli: str, swedish: str, pos: str, user: str) -> Dict:
+        """Return the journal record of an entry added now."""
+        return {
+            'meankieli': meankieli,
+            'swedish': swedish,
+            'pos': pos,
+            'user': user,
+            'added': datetime.now().isoformat(timespec='seconds')
+        }
+
+    def append_to_journal(self, record: Dict):
+        """Durably append a record to the journal, starting it if needed."""
+        lines = []
+        new_journal = not os.path.exists(self.journal_path)
+        if new_journal:
+            # The first line ties the journal to the XML file it extends
+            stat = os.stat(self.xml_path)
+            lines.append({'base': {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                                   'sha1': hash_file(self.xml_path).hex()}})
+        lines.append(record)
+
+        with open(self.journal_path, 'ab+') as f:
+            end = f.seek(0, os.SEEK_END)
+            if end > 0:
+                # Don't continue a line left half written by a crash
+                f.seek(end - 1)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+            for line in lines:
+                f.write((json.dumps(line, ensure_ascii=False) + "\n").encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        if new_journal and os.name == 'posix':
+            # Make the new journal file itself durable
+            dir_fd = os.open(os.path.dirname(os.path.abspath(self.journal_path)), os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+
+    def read_journal(self) -> List[Dict]:
+        """
+        Return the records of the journal that extends the current XML file.
+        A journal written against a different XML, e.g. one left behind by an
+        interrupted compaction, is moved aside instead of being applied twice.
+        """
+        if not os.path.exists(self.journal_path):
+            return []
+
+        with open(self.journal_path, 'rb') as f:
+            lines = f.read().splitlines()
+
+        records = []
+        base = None
+        for line_number, line in enumerate(lines, 1):
+            try:
+                data = json.loads(line)
+            except ValueError:
+                # A crash can leave the last line half written; it was never committed
+                logger.warning(f"Ignoring incomplete journal line {line_number} in {self.journal_path}")
+                continue
+            if line_number == 1:
+                base = data.get('base')
+            else:
+                records.append(data)
+
+        stat = os.stat(self.xml_path)
+        applies = (base is not None and base['size'] == stat.st_size and
+                   (base['mtime_ns'] == stat.st_mtime_ns or
+                    base['sha1'] == hash_file(self.xml_path).hex()))
+        if not applies:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            stale_path = f"{self.journal_path}.stale_{timestamp}"
+            os.replace(self.journal_path, stale_path)
+            logger.warning(f"Journal does not match {self.xml_path}, moved it to {stale_path}")
+            return []
+
+        return records
+
+    def replay_journal(self):
+        """Add the entries recorded in the journal to the in-memory indexes."""
+        records = self.read_journal()
+        for record in records:
+            self.index_word_element(self.build_word_element(
+                record['meankieli'], record['swedish'], record['pos'], record['user']))
+        self.journal_records = records
+        if records:
+            logger.info(f"Replayed {len(records)} journal entries")
+
+    def compact(self) -> bool:
+        """
+        Fold the journal into the XML file and remove it.
+        The XML is backed up and replaced atomically. When the journal holds exactly
+        the entries this instance replayed or added, the in-memory indexes match the
+        compacted file and are written to the index cache as is; otherwise another
+        instance added entries, and the cache is removed so the next load parses the XML.
+        Returns True if successful, False otherwise.
+        """
+        try:
+            records = self.read_journal()
+            if not records:
+                if os.path.exists(self.journal_path):
+                    os.remove(self.journal_path)
+                return True
+
+            self.create_backup()
+            tree = ET.parse(self.xml_path)
+            root = tree.getroot()
+            for record in records:
+                root.append(self.build_word_element(
+                    record['meankieli'], record['swedish'], record['pos'], record['user']))
+
+            temp_path = self.xml_path + ".tmp"
+            tree.write(temp_path, encoding='utf-8', xml_declaration=True)
+            with open(temp_path, 'rb') as f:
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.xml_path)
+            # A crash before this point leaves a journal whose base no longer matches,
+            # which read_journal sets aside rather than replaying
+            os.remove(self.journal_path)
+            logger.info(f"Compacted {len(records)} journal entries into {self.xml_path}")
+
+            if self.use_cache:
+                if records == self.journal_records:
+                    self.save_index_cache(os.stat(self.xml_path), hash_file(self.xml_path))
+                elif os.path.exists(self.cache_path):
+                    os.remove(self.cache_path)
+            self.journal_records = []
+            return True
+
+        except (OSError, ET.ParseError) as e:
+            logger.error(f"Error compacting journal: {str(e)}")
+            return False
+
     def load_dictionary(self):
-        """Load and parse the XML dictionary file."""
+        """
+        Load the entry store from the index cache, or parse the XML dictionary file,
+        then apply the journal of entries added since the last compaction.
+        """
+        self.query_cache.clear()
+        if self.use_cache and self.load_index_cache():
+            logger.info(f"Dictionary loaded from cache {self.cache_path}")
+        else:
+            self.parse_dictionary()
+        self.replay_journal()
+
+    def parse_dictionary(self):
+        """Parse the XML dictionary file into the entry store and write the index cache."""
         try:
             logger.info(f"Loading dictionary from {self.xml_path}")
-            self.tree = ET.parse(self.xml_path)
-            self.root = self.tree.getroot()
+            # Fingerprint the file before parsing, so a concurrent change invalidates the cache
+            stat = os.stat(self.xml_path)
+            digest = hash_file(self.xml_path) if self.use_cache else None
+            if self.streaming:
+                self.build_indexes(self.iter_word_elements())
+            else:
+                tree = ET.parse(self.xml_path)
+                self.build_indexes(tree.getroot().iter("w"))
             logger.info("Dictionary loaded successfully")
         except ET.ParseError as e:
             logger.error(f"Error parsing XML file: {str(e)}")
             raise
 
+        if self.use_cache:
+            self.save_index_cache(stat, digest)
+
+    def load_index_cache(self) -> bool:
+        """
+        Memory-map the index cache and use it as the entry store and indexes.
+        The cache is used when the XML size and mtime match its header, or when only
+        the mtime differs but the content hash still matches. Entries and posting
+        lists are read from the mapping on demand.
+        Returns True if the cache was loaded, False if it is missing or stale.
+        """
+        try:
+            stat = os.stat(self.xml_path)
+            with open(self.cache_path, 'rb') as f:
+                cache = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return False
+
+        try:
+            magic, version, size, mtime_ns, digest, manifest_offset, manifest_length = \
+                INDEX_CACHE_HEADER.unpack_from(cache, 0)
+            if magic != INDEX_CACHE_MAGIC or version != INDEX_CACHE_VERSION:
+                return False
+            if size != stat.st_size:
+                return False
+            if mtime_ns != stat.st_mtime_ns:
+                if hash_file(self.xml_path) != digest:
+                    return False
+                # Same content, new mtime: refresh the header so the hash isn't needed next time
+                self.write_index_cache_header(stat, digest, manifest_offset, manifest_length)
+
+            view = memoryview(cache)
+            manifest = marshal.loads(view[manifest_offset:manifest_offset + manifest_length])
+
+            def section(name, item_format=None):
+                offset, length = manifest[name]
+                data = view[offset:offset + length]
+                return data.cast(item_format) if item_format else data
+
+            entries = EntryTable(section("entries"), section("entry_offsets", 'Q'))
+            indexes = {}
+            for name, item_format in self.index_formats.items():
+                indexes[name] = PostingIndex.from_cache(marshal.loads(section(f"{name}.keys")),
+                                                        section(f"{name}.offsets", 'Q'),
+                                                        section(f"{name}.ids", item_format),
+                                                        item_format)
+        except (struct.error, ValueError, EOFError, TypeError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable index cache {self.cache_path}: {str(e)}")
+            return False
+
+        # The mapping stays open for as long as the entries and indexes refer to it
+        self.entries = entries
+        for name, index in indexes.items():
+            setattr(self, name, index)
+        return True
+
+    def save_index_cache(self, stat: os.stat_result, digest: bytes):
+        """Write the entry store and indexes to the index cache next to the XML file."""
+        sections = {}
+        sections["entries"], sections["entry_offsets"] = EntryTable.to_cache(self.entries)
+        for name in self.index_formats:
+            keys, offsets, ids = getattr(self, name).to_cache()
+            sections[f"{name}.keys"] = keys
+            sections[f"{name}.offsets"] = offsets
+            sections[f"{name}.ids"] = ids
+
+        # Processes parsing at the same time each write a temp file of their own
+        temp_path = f"{self.cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'wb') as f:
+                f.write(b"\0" * INDEX_CACHE_HEADER.size)
+                manifest = {}
+                for name, data in sections.items():
+                    # 8-byte alignment lets the uint arrays be cast in place
+                    offset = -(-f.tell() // 8) * 8
+                    f.seek(offset)
+                    f.write(data)
+                    manifest[name] = (offset, len(data))
+                manifest_offset = f.tell()
+                manifest = marshal.dumps(manifest)
+                f.write(manifest)
+                f.seek(0)
+                f.write(INDEX_CACHE_HEADER.pack(INDEX_CACHE_MAGIC, INDEX_CACHE_VERSION, stat.st_size,
+                                                stat.st_mtime_ns, digest, manifest_offset,
+                                                len(manifest)))
+            os.replace(temp_path, self.cache_path)
+            logger.info(f"Index cache written to {self.cache_path}")
+        except OSError as e:
+            # The cache is only an optimization, so keep going without it
+            logger.warning(f"Could not write index cache: {str(e)}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+
+    def write_index_cache_header(self, stat: os.stat_result, digest: bytes,
+                                 manifest_offset: int, manifest_length: int):
+        """Update the XML fingerprint in the header of an existing index cache."""
+        try:
+            with open(self.cache_path, 'r+b') as f:
+                f.write(INDEX_CACHE_HEADER.pack(INDEX_CACHE_MAGIC, INDEX_CACHE_VERSION, stat.st_size,
+                                                stat.st_mtime_ns, digest, manifest_offset,
+                                                manifest_length))
+        except OSError as e:
+            logger.warning(f"Could not update index cache header: {str(e)}")
+
+    def iter_word_elements(self):
+        """
+        Stream the <w> elements of the XML file with iterparse.
+        Each <w> element, and every trie node once all of its children have been
+        consumed, is detached from its parent and cleared, so only the current
+        path through the trie is held in memory.
+        """
+        path = []  # open elements from the root down to the current one
+        in_word = False
+        for event, elem in ET.iterparse(self.xml_path, events=("start", "end")):
+            if event == "start":
+                path.append(elem)
+                if elem.tag == "w":
+                    in_word = True
+                continue
+
+            path.pop()
+            if elem.tag == "w":
+                in_word = False
+                yield elem
+            elif in_word:
+                # <l>, <r> and <s> are read through their <w> element
+                continue
+
+            elem.clear()
+            if path:
+                # Earlier siblings are already detached, so this is the first child
+                path[-1].remove(elem)
+
+    def build_indexes(self, word_elems):
+        """
+        Build the entry store and lookup indexes from an iterable of <w> elements.
+        headword_index maps the normalized headword and translation_index every
+        normalized Swedish alternative to ids in entries, and the folded_* indexes
+        the same keys without diacritics. The n-gram indexes map the trigrams of
+        the folded headword and translation, so they serve both kinds of queries,
+        and the example indexes every example token, with and without diacritics,
+        to its positions. The elements are not referenced afterwards.
+        """
+        self.entries = []
+        self.reset_indexes()
+
+        for word_elem in word_elems:
+            self.index_word_element(word_elem)
+
+        logger.info(f"Indexed {len(self.entries)} translations")
+
+    def reset_indexes(self):
+        """Replace all lookup indexes with empty ones."""
+        for name, item_format in self.index_formats.items():
+            setattr(self, name, PostingIndex(item_format))
+
+    def index_word_element(self, word_elem):
+        """Flatten a <w> element into entries and add them to the indexes."""
+        source = normalize(word_elem.get("v", ""))
+
+        lefts = []
+        for l_elem in word_elem.findall("l"):
+            meankieli = l_elem.text.strip() if l_elem.text else ""
+            pos = sys.intern(self.get_pos_code(l_elem))
+            lefts.append((meankieli, pos, self.get_notes(l_elem)))
+
+        rights = []
+        for r_elem in word_elem.findall("r"):
+            swedish = ""
+            for s_elem in r_elem.findall("s"):
+                n_attr = s_elem.get("n", "")
+                if n_attr.startswith("t:"):
+                    swedish = n_attr[2:].strip()
+                    break
+            meankieli_examples, swedish_examples = self.get_examples(r_elem)
+            rights.append((swedish, tuple(meankieli_examples), tuple(swedish_examples)))
+
+        for meankieli, pos, notes in lefts:
+            for swedish, meankieli_examples, swedish_examples in rights:
+                if meankieli and swedish:
+                    self.add_to_indexes(Entry(source, meankieli, swedish, pos, notes,
+                                              meankieli_examples, swedish_examples))
+
+    def add_to_indexes(self, entry: Entry):
+        """Append an entry to the store and register it in the lookup indexes."""
+        entry_id = len(self.entries)
+        self.entries.append(entry)
+        self.headword_index.add(entry.headword, entry_id)
+        self.folded_headword_index.add(entry.folded_headword, entry_id)
+        for part in set(split_translation(entry.translation_key)):
+            self.translation_index.add(part, entry_id)
+        for part in set(split_translation(entry.folded_translation)):
+            self.folded_translation_index.add(part, entry_id)
+        for ngram in ngrams(entry.folded_headword):
+            self.headword_ngram_index.add(ngram, entry_id)
+        for ngram in ngrams(entry.folded_translation):
+            self.translation_ngram_index.add(ngram, entry_id)
+        self.index_examples(self.meankieli_example_index, entry_id, entry.meankieli_examples)
+        self.index_examples(self.swedish_example_index, entry_id, entry.swedish_examples)
+        self.index_examples(self.folded_meankieli_example_index, entry_id, entry.meankieli_examples, True)
+        self.index_examples(self.folded_swedish_example_index, entry_id, entry.swedish_examples, True)
+        self.invalidate_cached_searches([entry])
+
+    def invalidate_cached_searches(self, entries: List[Entry]):
+        """Drop the cached searches that newly added entries would have matched."""
+        # Only those results are stale; the invalidation also keeps searches running
+        # concurrently from caching their result
+        self.query_cache.invalidate(lambda key: any(self.entry_matches(entry, *key) for entry in entries))
+
+    def index_examples(self, index: PostingIndex, entry_id: int, examples: Tuple[str, ...],
+                       fold_diacritics: bool = False):
+        """Add the token positions of an entry's examples to a positional index."""
+        position = 0
+        for example in examples:
+            for token in tokenize_example(example):
+                if position >= EXAMPLE_POSITION_LIMIT:
+                    return
+                if fold_diacritics:
+                    token = strip_diacritics(token)
+                index.add(token, entry_id * EXAMPLE_POSITION_LIMIT + position)
+                position += 1
+            # Leave a gap so phrases don't match across two examples
+            position += 1
+
+    def example_index(self, direction: str, fold_diacritics: bool = False) -> PostingIndex:
+        """Return the positional index over the examples searched in the given direction."""
+        if direction == "meänkieli-sv":
+            return self.folded_meankieli_example_index if fold_diacritics else self.meankieli_example_index
+        return self.folded_swedish_example_index if fold_diacritics else self.swedish_example_index
+
+    def phrase_matches(self, index: PostingIndex, tokens: List[str]) -> Counter:
+        """Count the occurrences of a token sequence per entry id in a positional index."""
+        positions = index.get(tokens[0])
+        for offset, token in enumerate(tokens[1:], 1):
+            following = set(index.get(token))
+            positions = [p for p in positions if p + offset in following]
+        return Counter(p // EXAMPLE_POSITION_LIMIT for p in positions)
+
+    def substring_candidates(self, index: PostingIndex, fragment: str) -> List[int]:
+        """
+        Return the ascending ids of entries whose text may contain fragment, using an
+        n-gram index. Candidates still have to be checked, since sharing all
+        trigrams with the fragment doesn't guarantee the fragment itself occurs.
+        The n-gram indexes hold folded keys, so the fragment is folded first.
+        """
+        fragment = strip_diacritics(fragment)
+        if len(fragment) >= NGRAM_SIZE:
+            grams = {fragment[i:i + NGRAM_SIZE] for i in range(len(fragment) - NGRAM_SIZE + 1)}
+            return intersect_postings([index.get(gram) for gram in grams])
+
+        # Shorter fragments occur only inside the (padded) trigrams that contain them
+        entry_ids = set()
+        for gram in index.keys():
+            if fragment in gram:
+                entry_ids.update(index.get(gram))
+        return sorted(entry_ids)
+
+    def build_result(self, entry_id: int, direction: str) -> Dict:
+        """Build the result dict for a stored entry in the given direction."""
+        entry = self.entries[entry_id]
+        if direction == "sv-meänkieli":
+            source, target = entry.swedish, entry.meankieli
+        else:
+            source, target = entry.meankieli, entry.swedish
+        return {
+            'source': source,
+            'target': target,
+            'pos': self.metadata.get(entry.pos, entry.pos),
+            'meankieli_examples': list(entry.meankieli_examples),
+            'swedish_examples': list(entry.swedish_examples),
+            'notes': entry.notes
+        }
+
     def load_metadata(self):
         """Load and parse the lookup.js file to extract metadata for XML tags."""
         try:
@@ -114,14 +1002,19 @@ class Dictionary:
             logger.error(f"Error loading metadata: {str(e)}")
             raise
 
-    def get_pos_tag(self, node) -> str:
-        """Extract part of speech tag from a node."""
+    def get_pos_code(self, node) -> str:
+        """Extract the raw part of speech code from a node."""
         for s_node in node.findall("s"):
             n_attr = s_node.get("n", "")
-            if n_attr in ['s', 'a', 'adv', 'v', 'en', 'pos', 'pron', 'num', 'konj', 'ij', 'prep']:
-                return self.metadata.get(n_attr, n_attr)
+            if n_attr in POS_CODES:
+                return n_attr
         return ""
 
+    def get_pos_tag(self, node) -> str:
+        """Extract part of speech tag from a node."""
+        pos = self.get_pos_code(node)
+        return self.metadata.get(pos, pos)
+
     def get_examples(self, r_elem) -> Tuple[List[str], List[str]]:
         """Extract example sentences in both Meänkieli (exS) and Swedish (exT) from the <r> tag."""
         meankieli_examples = []
@@ -148,238 +1041,334 @@ class Dictionary:
         Search for a word in the dictionary.
         direction: "meänkieli-sv" for Meänkieli to Swedish, "sv-meänkieli" for Swedish to Meänkieli
         """
-        word = word.lower()
-        results = []
-
-        # Find all word entries
-        for word_elem in self.root.findall(".//w"):
-            source = word_elem.get("v", "").lower()
-            if source == word:  # Changed from startswith to exact match
-                logger.info(f"Found matching word: {source}")
-                # Get all translations
-                for l_elem in word_elem.findall("l"):
-                    meankieli = l_elem.text.strip() if l_elem.text else ""
-                    pos = self.get_pos_tag(l_elem)
-                    notes = self.get_notes(l_elem)
-
-                    # Get all right elements (translations)
-                    for r_elem in word_elem.findall("r"):
-                        swedish = ""
-                        for s_elem in r_elem.findall("s"):
-                            n_attr = s_elem.get("n", "")
-                            logger.info(f"Found attribute: {n_attr}")  # Debug output
-                            if n_attr.startswith("t:"):  # Changed from t= to t:
-                                swedish = n_attr[2:].strip()  # Extract the Swedish word
-                                logger.info(f"Found Swedish translation: {swedish}")  # Debug output
-                                break
-                        
-                        if meankieli and swedish:  # Ensure both Meänkieli and Swedish are present
-                            meankieli_examples, swedish_examples = self.get_examples(r_elem)
-                            if direction == "meänkieli-sv":
-                                results.append({
-                                    'source': meankieli,
-                                    'target': swedish,
-                                    'pos': pos,
-                                    'meankieli_examples': meankieli_examples,
-                                    'swedish_examples': swedish_examples,
-                                    'notes': notes
-                                })
-                            else:  # sv-meänkieli
-                                results.append({
-                                    'source': swedish,
-                                    'target': meankieli,
-                                    'pos': pos,
-                                    'meankieli_examples': meankieli_examples,
-                                    'swedish_examples': swedish_examples,
-                                    'notes': notes
-                                })
+        word = normalize(word)
+        results = [self.build_result(entry_id, direction)
+                   for entry_id in self.headword_index.get(word)]
 
         logger.info(f"Found {len(results)} results for word: {word}")
         return results
 
-    def search_word_exact(self, word: str, direction: str = "meänkieli-sv") -> List[Dict]:
+    def exact_index(self, direction: str, fold_diacritics: bool = False) -> PostingIndex:
+        """Return the index of whole headwords or Swedish alternatives searched in a direction."""
+        if direction == "sv-meänkieli":
+            return self.folded_translation_index if fold_diacritics else self.translation_index
+        return self.folded_headword_index if fold_diacritics else self.headword_index
+
+    @staticmethod
+    def entry_key(direction: str, fold_diacritics: bool = False):
+        """Return a function giving the normalized text of an entry that is searched in a direction."""
+        if direction == "sv-meänkieli":
+            return attrgetter('folded_translation' if fold_diacritics else 'translation_key')
+        return attrgetter('folded_headword' if fold_diacritics else 'headword')
+
+    def search_prefix(self, prefix: str, direction: str = "meänkieli-sv", limit: int = 10,
+                      fold_diacritics: bool = False) -> List[str]:
+        """
+        Return up to limit normalized words starting with prefix, in alphabetical order.
+        Completes Meänkieli headwords for "meänkieli-sv" and Swedish translations for
+        "sv-meänkieli", using the sorted keys of the exact-match indexes.
+        fold_diacritics: ignore diacritics; the completions are then folded as well
+        """
+        prefix = search_key(prefix, fold_diacritics)
+        index = self.exact_index(direction, fold_diacritics)
+
+        completions = index.prefix_keys(prefix, limit)
+
+        logger.info(f"Found {len(completions)} completions for prefix: {prefix}")
+        return completions
+
+    def search_fuzzy(self, word: str, max_distance: int = 2, direction: str = "meänkieli-sv",
+                     limit: int = 20, fold_diacritics: bool = False) -> List[Dict]:
+        """
+        Search for words within max_distance edits (insertions, deletions or
+        substitutions) of word, to find misspellings and spelling variants.
+        Matches Meänkieli headwords for "meänkieli-sv" and the Swedish alternatives
+        for "sv-meänkieli". Returns up to limit results, closest first, each
+        carrying its edit 'distance'.
+        fold_diacritics: compare the words without diacritics, so "a" and "ä" don't differ
+        """
+        word = search_key(word, fold_diacritics)
+        index = self.exact_index(direction, fold_diacritics)
+
+        results = []
+        seen = set()
+        for distance, key in sorted(index.fuzzy_keys(word, max_distance)):
+            for entry_id in index.get(key):
+                if entry_id in seen:
+                    continue
+                seen.add(entry_id)
+                result = self.build_result(entry_id, direction)
+                result['distance'] = distance
+                results.append(result)
+                if len(results) >= limit:
+                    break
+            if len(results) >= limit:
+                break
+
+        logger.info(f"Found {len(results)} fuzzy matches for word: {word}")
+        return results
+
+    def find_exact(self, word: str, direction: str = "meänkieli-sv", start: int = 0,
+                   stop: Optional[int] = None, fold_diacritics: bool = False) -> List[int]:
+        """Return the ascending ids of exact matches, limited to entry ids in range(start, stop)."""
+        word = search_key(word, fold_diacritics)
+        # Swedish words match any of the separated alternatives exactly
+        return clip_postings(self.exact_index(direction, fold_diacritics).get(word), start, stop)
+
+    def find_partial(self, word: str, direction: str = "meänkieli-sv", start: int = 0,
+                     stop: Optional[int] = None, fold_diacritics: bool = False) -> List[int]:
+        """Return the ascending ids of substring matches, limited to entry ids in range(start, stop)."""
+        word = search_key(word, fold_diacritics)
+        search_words = word.split()  # Split search phrase into words
+        stop = len(self.entries) if stop is None else stop
+        key_of = self.entry_key(direction, fold_diacritics)
+
+        if direction == "sv-meänkieli":
+            # For Swedish to Meänkieli, check if all search words appear in the translation
+            if search_words:
+                candidates = intersect_postings([
+                    self.substring_candidates(self.translation_ngram_index, search_word)
+                    for search_word in search_words])
+                candidates = clip_postings(candidates, start, stop)
+            else:
+                candidates = range(start, stop)
+            return [entry_id for entry_id in candidates
+                    if all(search_word in key_of(self.entries[entry_id])
+                           for search_word in search_words)]
+
+        # Partial match in source language
+        if word:
+            candidates = clip_postings(self.substring_candidates(self.headword_ngram_index, word),
+                                       start, stop)
+        else:
+            candidates = range(start, stop)
+        return [entry_id for entry_id in candidates if word in key_of(self.entries[entry_id])]
+
+    def find_in_examples(self, word: str, direction: str = "meänkieli-sv", start: int = 0,
+                         stop: Optional[int] = None, fold_diacritics: bool = False) -> List[int]:
+        """
+        Return the ascending ids of example matches, limited to entry ids in range(start, stop).
+        Example sentences aren't stored normalized, to keep the entry store small;
+        only the candidates found through the example index are normalized.
+        """
+        word = search_key(word, fold_diacritics)
+        stop = len(self.entries) if stop is None else stop
+
+        # Every token of the search text is part of some token of a matching example
+        fragments = set(tokenize_example(word))
+        if fragments:
+            index = self.example_index(direction, fold_diacritics)
+            candidates = intersect_postings([
+                sorted({posting // EXAMPLE_POSITION_LIMIT for token in index.keys() if fragment in token
+                        for posting in index.get(token)})
+                for fragment in fragments])
+            candidates = clip_postings(candidates, start, stop)
+        else:
+            candidates = range(start, stop)
+
+        entry_ids = []
+        for entry_id in candidates:
+            entry = self.entries[entry_id]
+            if direction == "meänkieli-sv":
+                examples = entry.meankieli_examples
+            else:  # sv-meänkieli
+                examples = entry.swedish_examples
+
+            # Check if word appears in examples
+            if any(word in search_key(ex, fold_diacritics) for ex in examples):
+                entry_ids.append(entry_id)
+        return entry_ids
+
+    def entry_matches(self, entry: Entry, word: str, direction: str, mode: str,
+                      fold_diacritics: bool = False) -> bool:
+        """
+        Return whether find_* for the normalized word would match a single entry.
+        Used to invalidate exactly the cached searches affected by a new entry.
+        """
+        if mode == "exact":
+            key = self.entry_key(direction, fold_diacritics)(entry)
+            if direction == "sv-meänkieli":
+                return word in split_translation(key)
+            return word == key
+        if mode == "partial":
+            key = self.entry_key(direction, fold_diacritics)(entry)
+            if direction == "sv-meänkieli":
+                return all(search_word in key for search_word in word.split())
+            return word in key
+        if direction == "meänkieli-sv":
+            examples = entry.meankieli_examples
+        else:  # sv-meänkieli
+            examples = entry.swedish_examples
+        return any(word in search_key(ex, fold_diacritics) for ex in examples)
+
+    def find(self, word: str, direction: str = "meänkieli-sv", mode: str = "exact",
+             candidates: Optional[Iterable[int]] = None,
+             fold_diacritics: bool = False) -> Tuple[int, ...]:
+        """
+        Return the ascending ids of the entries matching word in a search mode,
+        served from the query cache when the same search was run before.
+        candidates: ascending ids known to include every match (see SearchSession);
+        only those entries are checked instead of searching the indexes
+        fold_diacritics: ignore diacritics, so e.g. "a" also matches "ä"
+        """
+        find = self.find_method(mode)
+        key = (search_key(word, fold_diacritics), direction, mode, fold_diacritics)
+        entry_ids = self.query_cache.get(key)
+        if entry_ids is None:
+            # An entry added while searching may be missing from the result
+            data_version = self.query_cache.data_version
+            if candidates is None:
+                entry_ids = tuple(find(key[0], direction, fold_diacritics=fold_diacritics))
+            else:
+                entry_ids = tuple(entry_id for entry_id in candidates
+                                  if self.entry_matches(self.entries[entry_id], *key))
+            self.query_cache.put(key, entry_ids, data_version)
+        return entry_ids
+
+    def search_word_exact(self, word: str, direction: str = "meänkieli-sv",
+                          fold_diacritics: bool = False) -> List[Dict]:
         """
         Search for exact word matches in the dictionary.
         direction: "meänkieli-sv" for Meänkieli to Swedish, "sv-meänkieli" for Swedish to Meänkieli
         """
-        word = word.lower()
-        search_words = word.split()  # Split search phrase into words
-        results = []
+        results = [self.build_result(entry_id, direction)
+                   for entry_id in self.find(word, direction, "exact",
+                                             fold_diacritics=fold_diacritics)]
 
-        # Find all word entries
-        for word_elem in self.root.findall(".//w"):
-            source = word_elem.get("v", "").lower()
-            
-            # Get all translations
-            for l_elem in word_elem.findall("l"):
-                meankieli = l_elem.text.strip() if l_elem.text else ""
-                pos = self.get_pos_tag(l_elem)
-                notes = self.get_notes(l_elem)
-
-                # Get all right elements (translations)
-                for r_elem in word_elem.findall("r"):
-                    swedish = ""
-                    for s_elem in r_elem.findall("s"):
-                        n_attr = s_elem.get("n", "")
-                        if n_attr.startswith("t:"):
-                            swedish = n_attr[2:].strip()
-                            break
-                    
-                    if meankieli and swedish:
-                        # Split translations by various separators and clean each part
-                        separators = [',', '.', '/', ';', '|', '•', '·']
-                        target_parts = [swedish]
-                        for sep in separators:
-                            new_parts = []
-                            for part in target_parts:
-                                new_parts.extend(part.split(sep))
-                            target_parts = [p.strip().lower() for p in new_parts if p.strip()]
-                        
-                        # For exact matches, check if all search words appear in the translation
-                        if direction == "sv-meänkieli":
-                            # Check if any of the target parts exactly matches the search phrase
-                            if word in target_parts:
-                                meankieli_examples, swedish_examples = self.get_examples(r_elem)
-                                results.append({
-                                    'source': swedish,
-                                    'target': meankieli,
-                                    'pos': pos,
-                                    'meankieli_examples': meankieli_examples,
-                                    'swedish_examples': swedish_examples,
-                                    'notes': notes
-                                })
-                        elif source == word:  # Exact match in source language
-                            meankieli_examples, swedish_examples = self.get_examples(r_elem)
-                            results.append({
-                                'source': meankieli,
-                                'target': swedish,
-                                'pos': pos,
-                                'meankieli_examples': meankieli_examples,
-                                'swedish_examples': swedish_examples,
-                                'notes': notes
-                            })
-
-        logger.info(f"Found {len(results)} exact matches for word: {word}")
+        logger.info(f"Found {len(results)} exact matches for word: {normalize(word)}")
         return results
 
-    def search_word_partial(self, word: str, direction: str = "meänkieli-sv") -> List[Dict]:
+    def search_word_partial(self, word: str, direction: str = "meänkieli-sv",
+                            fold_diacritics: bool = False) -> List[Dict]:
         """
         Search for words that contain the search term as a substring.
         direction: "meänkieli-sv" for Meänkieli to Swedish, "sv-meänkieli" for Swedish to Meänkieli
         """
-        word = word.lower()
-        search_words = word.split()  # Split search phrase into words
-        results = []
+        results = [self.build_result(entry_id, direction)
+                   for entry_id in self.find(word, direction, "partial",
+                                             fold_diacritics=fold_diacritics)]
 
-        # Find all word entries
-        for word_elem in self.root.findall(".//w"):
-            source = word_elem.get("v", "").lower()
-            
-            # Get all translations
-            for l_elem in word_elem.findall("l"):
-                meankieli = l_elem.text.strip() if l_elem.text else ""
-                pos = self.get_pos_tag(l_elem)
-                notes = self.get_notes(l_elem)
-
-                # Get all right elements (translations)
-                for r_elem in word_elem.findall("r"):
-                    swedish = ""
-                    for s_elem in r_elem.findall("s"):
-                        n_attr = s_elem.get("n", "")
-                        if n_attr.startswith("t:"):
-                            swedish = n_attr[2:].strip()
-                            break
-                    
-                    if meankieli and swedish:
-                        if direction == "sv-meänkieli":
-                            # For Swedish to Meänkieli, check if all search words appear in the translation
-                            translation_text = swedish.lower()
-                            if all(search_word in translation_text for search_word in search_words):
-                                meankieli_examples, swedish_examples = self.get_examples(r_elem)
-                                results.append({
-                                    'source': swedish,
-                                    'target': meankieli,
-                                    'pos': pos,
-                                    'meankieli_examples': meankieli_examples,
-                                    'swedish_examples': swedish_examples,
-                                    'notes': notes
-                                })
-                        elif word in source:  # Partial match in source language
-                            meankieli_examples, swedish_examples = self.get_examples(r_elem)
-                            results.append({
-                                'source': meankieli,
-                                'target': swedish,
-                                'pos': pos,
-                                'meankieli_examples': meankieli_examples,
-                                'swedish_examples': swedish_examples,
-                                'notes': notes
-                            })
-
-        logger.info(f"Found {len(results)} partial matches for word: {word}")
+        logger.info(f"Found {len(results)} partial matches for word: {normalize(word)}")
         return results
 
-    def search_word_in_examples(self, word: str, direction: str = "meänkieli-sv") -> List[Dict]:
+    def search_word_in_examples(self, word: str, direction: str = "meänkieli-sv",
+                                fold_diacritics: bool = False) -> List[Dict]:
         """
         Search for the word in example sentences.
         direction: "meänkieli-sv" for Meänkieli to Swedish, "sv-meänkieli" for Swedish to Meänkieli
         """
-        word = word.lower()
+        results = [self.build_result(entry_id, direction)
+                   for entry_id in self.find(word, direction, "examples",
+                                             fold_diacritics=fold_diacritics)]
+
+        logger.info(f"Found {len(results)} matches in examples for word: {normalize(word)}")
+        return results
+
+    def search_examples(self, query: str, direction: str = "meänkieli-sv", limit: int = 20,
+                        fold_diacritics: bool = False) -> List[Dict]:
+        """
+        Full-text search over example sentences, ranked by relevance.
+        Words match whole tokens and "double-quoted phrases" consecutive tokens; every
+        term has to occur in the entry's examples. Entries are scored by tf-idf and
+        each result carries its 'score'.
+        direction: "meänkieli-sv" searches Meänkieli examples, "sv-meänkieli" Swedish ones
+        fold_diacritics: match tokens regardless of diacritics, e.g. "mina" finds "minä"
+        """
+        index = self.example_index(direction, fold_diacritics)
+        terms = parse_example_query(query)
+        if not terms:
+            return []
+        if fold_diacritics:
+            terms = [[strip_diacritics(token) for token in tokens] for tokens in terms]
+
+        scores = None
+        for tokens in terms:
+            matches = self.phrase_matches(index, tokens)
+            if not matches:
+                return []
+            idf = math.log(1 + len(self.entries) / len(matches))
+            if scores is None:
+                scores = {entry_id: count * idf for entry_id, count in matches.items()}
+            else:
+                scores = {entry_id: score + matches[entry_id] * idf
+                          for entry_id, score in scores.items() if entry_id in matches}
+
+        ranked = heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))
         results = []
+        for entry_id, score in ranked:
+            result = self.build_result(entry_id, direction)
+            result['score'] = round(score, 3)
+            results.append(result)
 
-        # Find all word entries
-        for word_elem in self.root.findall(".//w"):
-            source = word_elem.get("v", "").lower()
-            # Get all translations
-            for l_elem in word_elem.findall("l"):
-                meankieli = l_elem.text.strip() if l_elem.text else ""
-                pos = self.get_pos_tag(l_elem)
-                notes = self.get_notes(l_elem)
-
-                # Get all right elements (translations)
-                for r_elem in word_elem.findall("r"):
-                    swedish = ""
-                    for s_elem in r_elem.findall("s"):
-                        n_attr = s_elem.get("n", "")
-                        if n_attr.startswith("t:"):
-                            swedish = n_attr[2:].strip()
-                            break
-                    
-                    if meankieli and swedish:
-                        meankieli_examples, swedish_examples = self.get_examples(r_elem)
-                        # Check if word appears in examples
-                        found_in_examples = False
-                        if direction == "meänkieli-sv":
-                            for ex in meankieli_examples:
-                                if word in ex.lower():
-                                    found_in_examples = True
-                                    break
-                        else:  # sv-meänkieli
-                            for ex in swedish_examples:
-                                if word in ex.lower():
-                                    found_in_examples = True
-                                    break
-
-                        if found_in_examples:
-                            if direction == "meänkieli-sv":
-                                results.append({
-                                    'source': meankieli,
-                                    'target': swedish,
-                                    'pos': pos,
-                                    'meankieli_examples': meankieli_examples,
-                                    'swedish_examples': swedish_examples,
-                                    'notes': notes
-                                })
-                            else:  # sv-meänkieli
-                                results.append({
-                                    'source': swedish,
-                                    'target': meankieli,
-                                    'pos': pos,
-                                    'meankieli_examples': meankieli_examples,
-                                    'swedish_examples': swedish_examples,
-                                    'notes': notes
-                                })
-
-        logger.info(f"Found {len(results)} matches in examples for word: {word}")
+        logger.info(f"Found {len(scores)} example matches for query: {query}")
+        return results
+
+    def find_method(self, mode: str):
+        """Return the find_* method for a search mode: "exact", "partial" or "examples"."""
+        if mode == "exact":
+            return self.find_exact
+        if mode == "partial":
+            return self.find_partial
+        if mode == "examples":
+            return self.find_in_examples
+        raise ValueError(f"Unknown search mode: {mode}")
+
+    def query(self, word: str, modes: Iterable[str] = ("exact", "partial"),
+              directions: Iterable[str] = ("meänkieli-sv", "sv-meänkieli"),
+              session: Optional['SearchSession'] = None,
+              fold_diacritics: bool = False) -> List[Dict]:
+        """
+        Run several kinds of searches for one word and return a single result list.
+        Each entry appears once, under the first mode and direction (in the given
+        order) that matched it, so e.g. exact matches aren't repeated as partial ones.
+        Results are grouped by mode and carry the extra keys 'match' (the mode),
+        'direction' and 'entry_id'.
+        session: SearchSession of the user typing the word, to narrow down the
+        matches of their previous query instead of searching from scratch
+        fold_diacritics: ignore diacritics, so e.g. "a" also matches "ä"
+        """
+        find = session.find if session is not None else self.find
+        directions = tuple(directions)
+        seen = set()
+        results = []
+        for mode in modes:
+            for direction in directions:
+                for entry_id in find(word, direction, mode, fold_diacritics=fold_diacritics):
+                    if entry_id in seen:
+                        continue
+                    seen.add(entry_id)
+                    result = self.build_result(entry_id, direction)
+                    result['match'] = mode
+                    result['direction'] = direction
+                    result['entry_id'] = entry_id
+                    results.append(result)
+
+        logger.info(f"Found {len(results)} distinct matches for word: {normalize(word)}")
+        return results
+
+    def search_many(self, words: Iterable[str], direction: str = "meänkieli-sv",
+                    mode: str = "exact", fold_diacritics: bool = False) -> Dict[str, List[Dict]]:
+        """
+        Look up a batch of words and return a dict mapping each word to its results.
+        mode: "exact", "partial" or "examples", as in the search_word_* methods
+        fold_diacritics: ignore diacritics, so e.g. "a" also matches "ä"
+        Each distinct normalized word is resolved only once, so words differing only
+        in case or Unicode form share one result list.
+        """
+        self.find_method(mode)  # Reject unknown modes
+        results = {}
+        by_key = {}
+        for word in words:
+            if word in results:
+                continue
+            key = search_key(word, fold_diacritics)
+            if key not in by_key:
+                by_key[key] = [self.build_result(entry_id, direction)
+                               for entry_id in self.find(key, direction, mode,
+                                                         fold_diacritics=fold_diacritics)]
+            results[word] = by_key[key]
+
+        logger.info(f"Resolved {len(results)} distinct words ({len(by_key)} lookups)")
         return results
 
     def save_results(self, results: List[Dict], base_filename: str):
@@ -390,7 +1379,8 @@ class Dictionary:
             json.dump(results, f, ensure_ascii=False, indent=2)
         logger.info(f"Results saved to {json_filename}")
 
-        # Save as CSV
+        # Save as CSV (pandas is imported here to keep startup fast)
+        import pandas as pd
         csv_filename = f"{base_filename}.csv"
         df = pd.DataFrame(results)
         df.to_csv(csv_filename, index=False, encoding='utf-8')
@@ -412,6 +1402,56 @@ def print_results(results: List[Dict], search_type: str):
     else:
         print(f"\n{search_type}: No results found.")
 
+class SearchSession:
+    """
+    Incremental search state of one user, e.g. a GUI window typing a word.
+    The matches of the last query are kept per direction and mode. When the next
+    query extends it ("kirj" -> "kirja"), every new partial or example match is
+    among them, so only those entries (and any added since) are rechecked
+    instead of searching the indexes again; other edits, such as deleting
+    characters, and queries with too many previous matches fall back to a
+    full lookup. A session is not thread-safe.
+    """
+    def __init__(self, dictionary: Dictionary):
+        self.dictionary = dictionary
+        self.last = {}  # (direction, mode, fold_diacritics) -> (normalized word, matching ids, entry count)
+        # Rechecking more entries than this is slower than probing the n-gram indexes
+        self.narrow_limit = 500
+        self.narrowed = 0
+        self.full_lookups = 0
+
+    @staticmethod
+    def refines(previous: str, word: str, direction: str, mode: str) -> bool:
+        """Return whether every match of word also matches the previous word."""
+        if mode == "exact":
+            return False
+        if mode == "partial" and direction == "sv-meänkieli":
+            # Every word of the previous query is part of a word of the new one
+            search_words = word.split()
+            return all(any(part in search_word for search_word in search_words)
+                       for part in previous.split())
+        return previous in word
+
+    def find(self, word: str, direction: str = "meänkieli-sv", mode: str = "exact",
+             fold_diacritics: bool = False) -> Tuple[int, ...]:
+        """Dictionary.find, narrowing the previous matches when the word extends the last query."""
+        word = search_key(word, fold_diacritics)
+        entry_count = len(self.dictionary.entries)
+        candidates = None
+        last = self.last.get((direction, mode, fold_diacritics))
+        if (last is not None and len(last[1]) <= self.narrow_limit
+                and self.refines(last[0], word, direction, mode)):
+            previous, entry_ids, previous_count = last
+            # Entries are only ever appended, so newer ones are checked as well
+            candidates = chain(entry_ids, range(previous_count, entry_count))
+            self.narrowed += 1
+        else:
+            self.full_lookups += 1
+
+        entry_ids = self.dictionary.find(word, direction, mode, candidates, fold_diacritics)
+        self.last[(direction, mode, fold_diacritics)] = (word, entry_ids, entry_count)
+        return entry_ids
+
 def main():
     # Initialize dictionary
     dict_path = "fit-swe-lr-trie.xml"
@@ -421,7 +1461,7 @@ def main():
     # Test word
     test_word = "kirja"
     
-    # Test all three search methods
+    # Test all search methods
     print(f"\nSearching for '{test_word}' using different methods:")
     
     # 1. Exact match
@@ -438,7 +1478,19 @@ def main():
     results = dictionary.search_word_partial(test_word, "sv-meänkieli")
     print_results(results, "Swedish → Meänkieli")
     
-    # 3. Example text search
+    # 3. Prefix completion
+    print("\n=== Prefix Completion ===")
+    print(f"Meänkieli: {', '.join(dictionary.search_prefix(test_word[:3], 'meänkieli-sv'))}")
+    print(f"Swedish: {', '.join(dictionary.search_prefix(test_word[:3], 'sv-meänkieli'))}")
+
+    # 4. Fuzzy match
+    print("\n=== Fuzzy Match Search ===")
+    results = dictionary.search_fuzzy(test_word, 1, "meänkieli-sv")
+    print_results(results, "Meänkieli → Swedish")
+    results = dictionary.search_fuzzy(test_word, 1, "sv-meänkieli")
+    print_results(results, "Swedish → Meänkieli")
+
+    # 5. Example text search
     print("\n=== Example Text Search ===")
     results = dictionary.search_word_in_examples(test_word, "meänkieli-sv")
     print_results(results, "Meänkieli → Swedish")
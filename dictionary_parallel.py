@@ -0,0 +1,84 @@
+import multiprocessing
+import os
+import time
+from typing import Dict, Iterable, List
+import logging
+from dictionary_lookup import Dictionary, search_key
+
+logger = logging.getLogger(__name__)
+
+# Dictionary of the current worker process, opened by init_worker
+worker_dictionary = None
+
+def init_worker(xml_path: str, lookup_js_path: str):
+    """Open the dictionary in a pool worker from the memory-mapped index cache."""
+    global worker_dictionary
+    worker_dictionary = Dictionary(xml_path, lookup_js_path)
+
+def search_chunk(keys: List[str], direction: str, mode: str, stop: int,
+                 fold_diacritics: bool = False) -> List[List[int]]:
+    """Return the matching entry ids below stop for each key."""
+    find = worker_dictionary.find_method(mode)
+    return [find(key, direction, 0, stop, fold_diacritics) for key in keys]
+
+class ParallelDictionary:
+    """
+    Runs batch lookups of a Dictionary on a pool of worker processes.
+    Workers open the dictionary from its index cache, so the entry store is
+    shared through the page cache instead of being parsed once per process.
+    The batch is split into chunks of words, one task each; every worker maps
+    the complete indexes, so each word is searched with a single index probe.
+    (Splitting by entry id range would repeat the probe, which dominates
+    partial and example searches, in every worker.) The entry ids found are
+    turned into results in this process.
+    Workers replay the journal like any Dictionary, but entries added after the
+    pool was started are not seen by them.
+    """
+    def __init__(self, dictionary: Dictionary, processes: int = None):
+        if not dictionary.use_cache:
+            raise ValueError("ParallelDictionary needs a Dictionary with the index cache enabled")
+
+        self.dictionary = dictionary
+        self.processes = processes or os.cpu_count() or 1
+        self.pool = multiprocessing.Pool(self.processes, init_worker,
+                                         (dictionary.xml_path, dictionary.lookup_js_path))
+
+    def search_many(self, words: Iterable[str], direction: str = "meänkieli-sv",
+                    mode: str = "exact", fold_diacritics: bool = False) -> Dict[str, List[Dict]]:
+        """Parallel version of Dictionary.search_many, returning the same results."""
+        self.dictionary.find_method(mode)  # Reject unknown modes before fanning out
+        start_time = time.perf_counter()
+        words = list(dict.fromkeys(words))
+        keys = list(dict.fromkeys(search_key(word, fold_diacritics) for word in words))
+
+        # Several chunks per worker even out words of very different cost
+        chunk_size = -(-len(keys) // (self.processes * 4)) or 1
+        chunks = [keys[i:i + chunk_size] for i in range(0, len(keys), chunk_size)]
+        # Entry ids a worker knows of but this process doesn't, e.g. from a newer journal, are left out
+        stop = len(self.dictionary.entries)
+
+        pending = [self.pool.apply_async(search_chunk, (chunk, direction, mode, stop, fold_diacritics))
+                   for chunk in chunks]
+
+        entry_ids = {}
+        for chunk, result in zip(chunks, pending):
+            entry_ids.update(zip(chunk, result.get()))
+
+        by_key = {key: [self.dictionary.build_result(entry_id, direction) for entry_id in ids]
+                  for key, ids in entry_ids.items()}
+        results = {word: by_key[search_key(word, fold_diacritics)] for word in words}
+
+        logger.info(f"Resolved {len(results)} distinct words on {len(chunks)} tasks "
+                    f"in {time.perf_counter() - start_time:.3f} s")
+        return results
+
+    def close(self):
+        """Stop the worker processes."""
+        self.pool.close()
+        self.pool.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
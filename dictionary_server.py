@@ -0,0 +1,265 @@
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Tuple
+from urllib.parse import parse_qs, urlsplit
+from dictionary_lookup import Dictionary
+from dictionary_sqlite import SQLiteDictionary
+
+logger = logging.getLogger(__name__)
+
+DIRECTIONS = ("meänkieli-sv", "sv-meänkieli")
+
+REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable",
+}
+
+class BadRequest(Exception):
+    """Raised by endpoint handlers for invalid query parameters."""
+
+class LookupServer:
+    """
+    HTTP/JSON lookup service answering searches from one loaded Dictionary.
+
+    Endpoints (GET, parameters in the query string):
+      /exact?q=word        exact matches          direction, fold
+      /partial?q=word      substring matches      direction, fold
+      /prefix?q=prefix     completions            direction, fold, limit
+      /examples?q=query    ranked example search  direction, fold, limit
+      /fuzzy?q=word        spelling variants      direction, fold, limit, distance
+      /stats               query cache counters
+
+    direction is "meänkieli-sv" (default) or "sv-meänkieli" and fold=1 ignores
+    diacritics. Connections are kept alive between requests. Searches run on a
+    pool of max_concurrency threads, so the event loop keeps accepting requests;
+    a request that waits longer than queue_timeout for a free slot gets a 503.
+    Every response carries a Server-Timing header with the queueing, search
+    and total time in milliseconds.
+    """
+    def __init__(self, dictionary: Dictionary, max_concurrency: int = 4,
+                 queue_timeout: float = 5.0, keep_alive_timeout: float = 15.0):
+        self.dictionary = dictionary
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self.keep_alive_timeout = keep_alive_timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency)
+        self.slots = None  # asyncio.Semaphore, created on the server's event loop
+        self.routes = {
+            '/exact': self.exact,
+            '/partial': self.partial,
+            '/prefix': self.prefix,
+            '/examples': self.examples,
+            '/fuzzy': self.fuzzy,
+            '/stats': self.stats,
+        }
+
+    # Endpoints, run on the worker threads
+
+    @staticmethod
+    def word_params(params: Dict[str, str]) -> Tuple[str, str, bool]:
+        """Return the required q, the direction and the fold flag of a request."""
+        word = params.get('q', "").strip()
+        if not word:
+            raise BadRequest("missing parameter: q")
+        direction = params.get('direction', DIRECTIONS[0])
+        if direction not in DIRECTIONS:
+            raise BadRequest(f"direction must be one of: {', '.join(DIRECTIONS)}")
+        return word, direction, params.get('fold', "0") in ("1", "true", "yes")
+
+    @staticmethod
+    def int_param(params: Dict[str, str], name: str, default: int, maximum: int) -> int:
+        """Return an integer parameter in range(0, maximum + 1)."""
+        try:
+            value = int(params.get(name, default))
+        except ValueError:
+            raise BadRequest(f"{name} must be an integer")
+        if not 0 <= value <= maximum:
+            raise BadRequest(f"{name} must be between 0 and {maximum}")
+        return value
+
+    def exact(self, params: Dict[str, str]) -> Dict:
+        word, direction, fold = self.word_params(params)
+        results = self.dictionary.search_word_exact(word, direction, fold)
+        return {'query': word, 'direction': direction, 'count': len(results), 'results': results}
+
+    def partial(self, params: Dict[str, str]) -> Dict:
+        word, direction, fold = self.word_params(params)
+        results = self.dictionary.search_word_partial(word, direction, fold)
+        return {'query': word, 'direction': direction, 'count': len(results), 'results': results}
+
+    def prefix(self, params: Dict[str, str]) -> Dict:
+        word, direction, fold = self.word_params(params)
+        limit = self.int_param(params, 'limit', 10, 1000)
+        completions = self.dictionary.search_prefix(word, direction, limit, fold)
+        return {'query': word, 'direction': direction, 'completions': completions}
+
+    def examples(self, params: Dict[str, str]) -> Dict:
+        query, direction, fold = self.word_params(params)
+        limit = self.int_param(params, 'limit', 20, 1000)
+        results = self.dictionary.search_examples(query, direction, limit, fold)
+        return {'query': query, 'direction': direction, 'count': len(results), 'results': results}
+
+    def fuzzy(self, params: Dict[str, str]) -> Dict:
+        word, direction, fold = self.word_params(params)
+        limit = self.int_param(params, 'limit', 20, 1000)
+        distance = self.int_param(params, 'distance', 2, 3)
+        results = self.dictionary.search_fuzzy(word, distance, direction, limit, fold)
+        return {'query': word, 'direction': direction, 'count': len(results), 'results': results}
+
+    def stats(self, params: Dict[str, str]) -> Dict:
+        return {'entries': len(self.dictionary.entries), 'query_cache': self.dictionary.query_cache.stats()}
+
+    # HTTP handling, on the event loop
+
+    async def handle_request(self, method: str, target: str) -> Tuple[int, Dict, Dict[str, str]]:
+        """Run the endpoint for a request and return (status, JSON payload, extra headers)."""
+        if method != "GET":
+            return 405, {'error': "only GET is supported"}, {'Allow': "GET"}
+        url = urlsplit(target)
+        handler = self.routes.get(url.path.rstrip("/") or "/")
+        if handler is None:
+            return 404, {'error': f"unknown endpoint: {url.path}"}, {}
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            return 503, {'error': "too many concurrent requests"}, {'Retry-After': "1"}
+        queued = time.perf_counter()
+        try:
+            payload = await asyncio.get_running_loop().run_in_executor(
+                self.executor, partial(handler, params))
+            status = 200
+        except BadRequest as e:
+            payload, status = {'error': str(e)}, 400
+        except Exception as e:
+            logger.exception(f"Error handling {target}")
+            payload, status = {'error': str(e)}, 500
+        finally:
+            self.slots.release()
+        searched = time.perf_counter()
+
+        timing = f"queue;dur={(queued - start) * 1000:.2f}, search;dur={(searched - queued) * 1000:.2f}"
+        return status, payload, {'Server-Timing': timing}
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve the requests of one connection until the client or a timeout closes it."""
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.keep_alive_timeout)
+                except asyncio.LimitOverrunError:
+                    await self.write_response(writer, 431, {'error': "request head too large"}, {}, False)
+                    break
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                start = time.perf_counter()
+
+                lines = head.decode('latin-1').split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ")
+                    headers = {}
+                    for line in lines[1:]:
+                        if line:
+                            name, value = line.split(":", 1)
+                            headers[name.strip().lower()] = value.strip()
+                    body_length = int(headers.get('content-length', 0))
+                    if body_length < 0:
+                        raise ValueError("negative Content-Length")
+                except ValueError:
+                    await self.write_response(writer, 400, {'error': "malformed request"}, {}, False)
+                    break
+                # Clients send non-ASCII characters of the target, e.g. ä in q=äpple, as UTF-8
+                target = target.encode('latin-1').decode('utf-8', 'replace')
+                if body_length:
+                    await reader.readexactly(body_length)  # Requests have no body; skip it
+
+                connection = headers.get('connection', "").lower()
+                if version == "HTTP/1.1":
+                    keep_alive = connection != "close"
+                else:
+                    keep_alive = connection == "keep-alive"
+
+                status, payload, extra_headers = await self.handle_request(method, target)
+                total = f"total;dur={(time.perf_counter() - start) * 1000:.2f}"
+                timing = extra_headers.get('Server-Timing')
+                extra_headers['Server-Timing'] = f"{timing}, {total}" if timing else total
+                await self.write_response(writer, status, payload, extra_headers, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def write_response(self, writer: asyncio.StreamWriter, status: int, payload: Dict,
+                             extra_headers: Dict[str, str], keep_alive: bool):
+        """Send a JSON response."""
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        headers = {
+            'Content-Type': "application/json; charset=utf-8",
+            'Content-Length': str(len(body)),
+            'Connection': "keep-alive" if keep_alive else "close",
+            'Access-Control-Allow-Origin': "*",  # Let the web front end call the service
+            **extra_headers,
+        }
+        head = f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        writer.write(head.encode('latin-1') + b"\r\n" + body)
+        await writer.drain()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8080):
+        """Listen on host:port until cancelled."""
+        self.slots = asyncio.Semaphore(self.max_concurrency)
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        addresses = ", ".join(str(sock.getsockname()) for sock in server.sockets)
+        print(f"Serving dictionary lookups on {addresses}", file=sys.stderr)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve dictionary lookups as JSON over HTTP from one loaded dictionary.")
+    parser.add_argument('--host', default="127.0.0.1")
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--max-concurrency', type=int, default=4,
+                        help="searches run at the same time; further requests wait")
+    parser.add_argument('--queue-timeout', type=float, default=5.0,
+                        help="seconds a request may wait for a search slot before getting a 503")
+    parser.add_argument('--xml', default="fit-swe-lr-trie.xml")
+    parser.add_argument('--lookup-js', default="lookup.js")
+    parser.add_argument('--sqlite', action='store_true',
+                        help="search the SQLite database next to the XML instead of in-memory indexes")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        dictionary = SQLiteDictionary(args.xml, args.lookup_js)
+    else:
+        dictionary = Dictionary(args.xml, args.lookup_js)
+    server = LookupServer(dictionary, args.max_concurrency, args.queue_timeout)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
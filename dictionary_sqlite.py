@@ -0,0 +1,438 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+from dictionary_lookup import (Dictionary, Entry, PostingIndex, hash_file, normalize,
+                               parse_example_query, search_key, split_translation,
+                               strip_diacritics, tokenize_example)
+
+logger = logging.getLogger(__name__)
+
+DATABASE_SUFFIX = ".sqlite"
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE meta (name TEXT PRIMARY KEY, value);
+CREATE TABLE entries (
+    id INTEGER PRIMARY KEY,
+    headword TEXT NOT NULL,
+    meankieli TEXT NOT NULL,
+    swedish TEXT NOT NULL,
+    pos TEXT NOT NULL,
+    notes TEXT,
+    meankieli_examples TEXT NOT NULL,
+    swedish_examples TEXT NOT NULL,
+    translation_key TEXT NOT NULL,
+    folded_headword TEXT NOT NULL,
+    folded_translation TEXT NOT NULL
+);
+CREATE INDEX entries_headword ON entries (headword, id);
+CREATE INDEX entries_folded_headword ON entries (folded_headword, id);
+CREATE TABLE translation_parts (part TEXT NOT NULL, folded_part TEXT NOT NULL, entry_id INTEGER NOT NULL);
+CREATE INDEX translation_parts_part ON translation_parts (part, entry_id);
+CREATE INDEX translation_parts_folded_part ON translation_parts (folded_part, entry_id);
+CREATE VIRTUAL TABLE entry_trigrams USING fts5(
+    headword, folded_headword, translation_key, folded_translation,
+    content='entries', content_rowid='id', tokenize='trigram');
+CREATE VIRTUAL TABLE example_trigrams USING fts5(
+    meankieli, swedish, folded_meankieli, folded_swedish, tokenize='trigram');
+CREATE VIRTUAL TABLE example_tokens USING fts5(
+    meankieli, swedish, folded_meankieli, folded_swedish, content='',
+    tokenize='unicode61 remove_diacritics 0');
+"""
+
+TABLES = ("meta", "entries", "translation_parts", "entry_trigrams", "example_trigrams", "example_tokens")
+
+def fts_phrase(text: str) -> str:
+    """Quote text as an FTS5 phrase."""
+    return '"' + text.replace('"', '""') + '"'
+
+def contains_phrase(tokens: List[str], phrase: List[str]) -> bool:
+    """Return whether phrase occurs as consecutive tokens in tokens."""
+    length = len(phrase)
+    return any(tokens[i:i + length] == phrase for i in range(len(tokens) - length + 1))
+
+class SQLiteKeyIndex(PostingIndex):
+    """
+    PostingIndex over one key column of the database, so the exact, prefix and
+    fuzzy lookups of Dictionary run against SQLite. Posting lists and prefix
+    completions are indexed queries; the sorted key list walked by fuzzy_keys
+    is read once and dropped whenever the number of entries changes.
+    The index is read-only: its rows are inserted by SQLiteDictionary.add_to_indexes,
+    which never calls add().
+    """
+    def __init__(self, dictionary: 'SQLiteDictionary', table: str, key_column: str, id_column: str):
+        super().__init__()
+        self.dictionary = dictionary
+        self.table = table
+        self.key_column = key_column
+        self.id_column = id_column
+        self.keys_loaded_at = None  # number of entries when sorted_keys was read
+
+    def get(self, key: str) -> List[int]:
+        rows = self.dictionary.connection.execute(
+            f"SELECT DISTINCT {self.id_column} FROM {self.table} WHERE {self.key_column} = ? "
+            f"ORDER BY {self.id_column}", (key,))
+        return [entry_id for entry_id, in rows]
+
+    def prefix_keys(self, prefix: str, limit: Optional[int] = None) -> List[str]:
+        # Text compares by code point, so the keys starting with prefix form one range
+        rows = self.dictionary.connection.execute(
+            f"SELECT DISTINCT {self.key_column} FROM {self.table} "
+            f"WHERE {self.key_column} >= ? AND {self.key_column} < ? ORDER BY {self.key_column} LIMIT ?",
+            (prefix, prefix + "\U0010ffff", -1 if limit is None else limit))
+        return [key for key, in rows]
+
+    def fuzzy_keys(self, word: str, max_distance: int):
+        entry_count = len(self.dictionary.entries)
+        if self.keys_loaded_at != entry_count:
+            self.sorted_keys = sorted(self.keys())
+            self.keys_loaded_at = entry_count
+        return super().fuzzy_keys(word, max_distance)
+
+    def keys(self):
+        rows = self.dictionary.connection.execute(f"SELECT DISTINCT {self.key_column} FROM {self.table}")
+        return {key for key, in rows}
+
+    def __contains__(self, key: str) -> bool:
+        return self.dictionary.connection.execute(
+            f"SELECT 1 FROM {self.table} WHERE {self.key_column} = ? LIMIT 1", (key,)).fetchone() is not None
+
+class SQLiteEntries:
+    """Read-only sequence of the entries stored in the database, indexed by entry id."""
+    def __init__(self, dictionary: 'SQLiteDictionary'):
+        self.dictionary = dictionary
+
+    @staticmethod
+    def from_row(row) -> Entry:
+        (headword, meankieli, swedish, pos, notes, meankieli_examples, swedish_examples,
+         translation_key, folded_headword, folded_translation) = row
+        return Entry(headword, meankieli, swedish, pos, notes,
+                     tuple(json.loads(meankieli_examples)), tuple(json.loads(swedish_examples)),
+                     translation_key, folded_headword, folded_translation)
+
+    def __len__(self) -> int:
+        # Ids are assigned consecutively from 0, and max() is an index lookup unlike count()
+        last, = self.dictionary.connection.execute("SELECT max(id) FROM entries").fetchone()
+        return 0 if last is None else last + 1
+
+    def __getitem__(self, entry_id: int) -> Entry:
+        row = self.dictionary.connection.execute(
+            f"SELECT {', '.join(Entry.__slots__)} FROM entries WHERE id = ?", (entry_id,)).fetchone()
+        if row is None:
+            raise IndexError(entry_id)
+        return self.from_row(row)
+
+    def __iter__(self):
+        rows = self.dictionary.connection.execute(
+            f"SELECT {', '.join(Entry.__slots__)} FROM entries ORDER BY id")
+        return (self.from_row(row) for row in rows)
+
+class SQLiteDictionary(Dictionary):
+    """
+    Dictionary whose entries and indexes live in an SQLite database next to the
+    XML file instead of in memory.
+    The XML is imported once and again only when it, or the journal of added
+    entries, changes. Headwords and Swedish alternatives have B-tree indexes;
+    substring searches use FTS5 trigram tables and search_examples an FTS5 token
+    table ranked by bm25. Results have the same shape as those of Dictionary.
+    The database is opened in WAL mode, so many processes can search it while
+    one adds entries; each thread uses its own connection.
+    """
+    def __init__(self, xml_path: str, lookup_js_path: str, db_path: Optional[str] = None,
+                 streaming: bool = True, query_cache_size: int = 1024,
+                 query_cache_bytes: int = 32 * 1024 * 1024):
+        """
+        db_path: database file, by default the XML path with DATABASE_SUFFIX appended
+        The other arguments are those of Dictionary.
+        """
+        self.db_path = db_path or xml_path + DATABASE_SUFFIX
+        self.local = threading.local()
+        self.known_count = None  # entry count the query cache was filled at
+        super().__init__(xml_path, lookup_js_path, streaming, False, query_cache_size, query_cache_bytes)
+
+    @property
+    def connection(self) -> sqlite3.Connection:
+        """Return this thread's connection to the database, opening it if needed."""
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            # Transactions are started explicitly, see transaction()
+            connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            self.local.connection = connection
+        return connection
+
+    @contextmanager
+    def transaction(self):
+        """Run a block as one write transaction, holding the write lock from the start."""
+        connection = self.connection
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def reset_indexes(self):
+        """Point the exact-match indexes at the database tables."""
+        self.headword_index = SQLiteKeyIndex(self, "entries", "headword", "id")
+        self.folded_headword_index = SQLiteKeyIndex(self, "entries", "folded_headword", "id")
+        self.translation_index = SQLiteKeyIndex(self, "translation_parts", "part", "entry_id")
+        self.folded_translation_index = SQLiteKeyIndex(self, "translation_parts", "folded_part", "entry_id")
+
+    def fingerprint(self) -> Dict:
+        """Return the state of the XML file and journal the database is imported from."""
+        stat = os.stat(self.xml_path)
+        journal_size = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+        return {'schema_version': SCHEMA_VERSION, 'xml_size': stat.st_size,
+                'xml_mtime_ns': stat.st_mtime_ns, 'journal_size': journal_size}
+
+    def read_meta(self) -> Dict:
+        try:
+            return dict(self.connection.execute("SELECT name, value FROM meta"))
+        except sqlite3.DatabaseError:
+            return {}
+
+    def write_meta(self, **values):
+        self.connection.executemany("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+                                    values.items())
+
+    def is_current(self) -> bool:
+        """
+        Return whether the database matches the XML file and journal.
+        As with the index cache, an XML file whose mtime changed but whose
+        content hash didn't still matches.
+        """
+        meta = self.read_meta()
+        current = self.fingerprint()
+        if any(meta.get(name) != current[name]
+               for name in ('schema_version', 'xml_size', 'journal_size')):
+            return False
+        if meta.get('xml_mtime_ns') != current['xml_mtime_ns']:
+            if meta.get('xml_sha1') != hash_file(self.xml_path).hex():
+                return False
+            with self.transaction():
+                self.write_meta(xml_mtime_ns=current['xml_mtime_ns'])
+        return True
+
+    def load_dictionary(self):
+        """Open the database, importing the XML file and journal first if it is missing or stale."""
+        self.query_cache.clear()
+        self.entries = SQLiteEntries(self)
+        self.reset_indexes()
+        if self.is_current():
+            logger.info(f"Dictionary opened from {self.db_path}")
+        else:
+            self.import_dictionary()
+        self.known_count = len(self.entries)
+
+    def import_dictionary(self):
+        """
+        Rebuild the database from the XML file and the journal in one transaction,
+        so readers see either the old or the new contents.
+        """
+        logger.info(f"Importing {self.xml_path} into {self.db_path}")
+        # Fingerprint the files first, so a concurrent change triggers another import
+        fingerprint = self.fingerprint()
+        digest = hash_file(self.xml_path).hex()
+        with self.transaction() as connection:
+            for table in TABLES:
+                connection.execute(f"DROP TABLE IF EXISTS {table}")
+            for statement in SCHEMA.split(";"):
+                if statement.strip():
+                    connection.execute(statement)
+            self.parse_dictionary()
+            self.replay_journal()
+            connection.execute("INSERT INTO entry_trigrams (entry_trigrams) VALUES ('rebuild')")
+            self.write_meta(xml_sha1=digest, **fingerprint)
+        connection.execute("PRAGMA optimize")
+        logger.info(f"Imported {len(self.entries)} translations")
+
+    def build_indexes(self, word_elems):
+        """Insert the entries of an iterable of <w> elements into the database."""
+        for word_elem in word_elems:
+            self.index_word_element(word_elem)
+
+    def add_to_indexes(self, entry: Entry):
+        """
+        Insert an entry and its index rows, in the caller's transaction.
+        The external-content trigram index over the entries is filled separately,
+        in bulk after an import and by add_entry afterwards.
+        """
+        connection = self.connection
+        entry_id = len(self.entries)
+        connection.execute(
+            f"INSERT INTO entries (id, {', '.join(Entry.__slots__)}) VALUES ({', '.join('?' * 11)})",
+            (entry_id, entry.headword, entry.meankieli, entry.swedish, entry.pos, entry.notes,
+             json.dumps(entry.meankieli_examples, ensure_ascii=False),
+             json.dumps(entry.swedish_examples, ensure_ascii=False),
+             entry.translation_key, entry.folded_headword, entry.folded_translation))
+        connection.executemany(
+            "INSERT INTO translation_parts (part, folded_part, entry_id) VALUES (?, ?, ?)",
+            [(part, strip_diacritics(part), entry_id) for part in set(split_translation(entry.translation_key))])
+        # One normalized example per line; NULL tells no examples from a single empty one
+        meankieli = "\n".join(map(normalize, entry.meankieli_examples)) if entry.meankieli_examples else None
+        swedish = "\n".join(map(normalize, entry.swedish_examples)) if entry.swedish_examples else None
+        connection.execute(
+            "INSERT INTO example_trigrams (rowid, meankieli, swedish, folded_meankieli, folded_swedish) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (entry_id, meankieli, swedish, meankieli and strip_diacritics(meankieli),
+             swedish and strip_diacritics(swedish)))
+        connection.execute(
+            "INSERT INTO example_tokens (rowid, meankieli, swedish, folded_meankieli, folded_swedish) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (entry_id, meankieli, swedish, meankieli and strip_diacritics(meankieli),
+             swedish and strip_diacritics(swedish)))
+
+    def add_entry(self, meankieli: str, swedish: str, pos: str, user: str) -> bool:
+        """
+        Add a new entry to the dictionary in one database transaction.
+        The entry is journaled as by Dictionary.add_entry, so compact() can fold it
+        into the XML; the journal size is committed along with the entry, and a
+        database that missed a journaled entry is imported again when opened.
+        Returns True if successful, False otherwise.
+        """
+        try:
+            record = self.journal_record(meankieli, swedish, pos, user)
+            with self.transaction():
+                # The write lock serializes journal appends between processes too
+                self.append_to_journal(record)
+                word_elem = self.build_word_element(meankieli, swedish, pos, user)
+                first_id = len(self.entries)
+                self.index_word_element(word_elem)
+                connection = self.connection
+                connection.execute(
+                    "INSERT INTO entry_trigrams (rowid, headword, folded_headword, translation_key, "
+                    "folded_translation) SELECT id, headword, folded_headword, translation_key, "
+                    "folded_translation FROM entries WHERE id >= ?", (first_id,))
+                self.write_meta(journal_size=os.path.getsize(self.journal_path))
+            self.invalidate_cached_searches([self.entries[entry_id]
+                                             for entry_id in range(first_id, len(self.entries))])
+            self.known_count = len(self.entries)
+            return True
+
+        except Exception as e:
+            logger.error(f"Error adding entry: {str(e)}")
+            return False
+
+    def compact(self) -> bool:
+        """Fold the journal into the XML file, then re-import the database to match it."""
+        if not super().compact():
+            return False
+        self.load_dictionary()
+        return True
+
+    def find(self, word: str, direction: str = "meänkieli-sv", mode: str = "exact",
+             candidates=None, fold_diacritics: bool = False):
+        # Another process may have added entries, making cached results stale
+        entry_count = len(self.entries)
+        if entry_count != self.known_count:
+            self.query_cache.clear()
+            self.known_count = entry_count
+        return super().find(word, direction, mode, candidates, fold_diacritics)
+
+    def trigram_matches(self, table: str, column: str, fragments: List[str], start: int, stop: int):
+        """
+        Return the (id, column text) rows with ids in range(start, stop), ascending,
+        whose column contains every fragment. Fragments of three or more characters
+        are matched through the trigram index, shorter ones by scanning the column.
+        """
+        long_fragments = [fragment for fragment in fragments if len(fragment) >= 3]
+        short_fragments = [fragment for fragment in fragments if len(fragment) < 3]
+        conditions = ["rowid >= ?", "rowid < ?"]
+        params = [start, stop]
+        if long_fragments:
+            conditions.append(f"{table} MATCH ?")
+            params.append(f"{{{column}}} : (" + " AND ".join(map(fts_phrase, long_fragments)) + ")")
+        for fragment in short_fragments:
+            conditions.append(f"instr({column}, ?) > 0")
+            params.append(fragment)
+        return self.connection.execute(
+            f"SELECT rowid, {column} FROM {table} WHERE {' AND '.join(conditions)} ORDER BY rowid", params)
+
+    def find_partial(self, word: str, direction: str = "meänkieli-sv", start: int = 0,
+                     stop: Optional[int] = None, fold_diacritics: bool = False) -> List[int]:
+        """Return the ascending ids of substring matches, limited to entry ids in range(start, stop)."""
+        word = search_key(word, fold_diacritics)
+        stop = len(self.entries) if stop is None else stop
+        if direction == "sv-meänkieli":
+            # Every search word has to appear in the translation
+            column = "folded_translation" if fold_diacritics else "translation_key"
+            fragments = word.split()
+        else:
+            column = "folded_headword" if fold_diacritics else "headword"
+            fragments = [word] if word else []
+        return [entry_id for entry_id, _ in self.trigram_matches("entry_trigrams", column, fragments,
+                                                                 start, stop)]
+
+    def find_in_examples(self, word: str, direction: str = "meänkieli-sv", start: int = 0,
+                         stop: Optional[int] = None, fold_diacritics: bool = False) -> List[int]:
+        """
+        Return the ascending ids of example matches, limited to entry ids in range(start, stop).
+        The trigram table holds each entry's normalized examples on separate lines,
+        so the candidates are checked against the individual examples.
+        """
+        word = search_key(word, fold_diacritics)
+        stop = len(self.entries) if stop is None else stop
+        column = "meankieli" if direction == "meänkieli-sv" else "swedish"
+        if fold_diacritics:
+            column = "folded_" + column
+        rows = self.trigram_matches("example_trigrams", column, [word] if word else [], start, stop)
+        return [entry_id for entry_id, examples in rows
+                if examples is not None and any(word in example for example in examples.split("\n"))]
+
+    def search_examples(self, query: str, direction: str = "meänkieli-sv", limit: int = 20,
+                        fold_diacritics: bool = False) -> List[Dict]:
+        """
+        Full-text search over example sentences, ranked by relevance.
+        Words match whole tokens and "double-quoted phrases" consecutive tokens; every
+        term has to occur in the entry's examples. Entries are ranked by FTS5's bm25
+        and each result carries its 'score'.
+        direction: "meänkieli-sv" searches Meänkieli examples, "sv-meänkieli" Swedish ones
+        fold_diacritics: match the folded tokens of the folded example columns
+        An entry's examples share one FTS5 row, in which a phrase can also match
+        across two examples, so phrase hits are checked against each example.
+        """
+        terms = parse_example_query(query)
+        if not terms:
+            return []
+        if fold_diacritics:
+            terms = [[strip_diacritics(token) for token in tokens] for tokens in terms]
+
+        column = "meankieli" if direction == "meänkieli-sv" else "swedish"
+        if fold_diacritics:
+            column = "folded_" + column
+        # bm25 weighs the searched column only
+        weights = ", ".join("1.0" if name == column else "0.0"
+                            for name in ("meankieli", "swedish", "folded_meankieli", "folded_swedish"))
+        expression = f"{{{column}}} : (" + " AND ".join(fts_phrase(" ".join(tokens)) for tokens in terms) + ")"
+        phrases = [tokens for tokens in terms if len(tokens) > 1]
+        rows = self.connection.execute(
+            f"SELECT rowid, bm25(example_tokens, {weights}) AS rank FROM example_tokens "
+            f"WHERE example_tokens MATCH ? ORDER BY rank, rowid LIMIT ?",
+            (expression, -1 if phrases else limit)).fetchall()
+
+        results = []
+        for entry_id, rank in rows:
+            if len(results) >= limit:
+                break
+            if phrases:
+                entry = self.entries[entry_id]
+                examples = entry.meankieli_examples if direction == "meänkieli-sv" else entry.swedish_examples
+                example_tokens = [tokenize_example(example) for example in examples]
+                if fold_diacritics:
+                    example_tokens = [[strip_diacritics(token) for token in tokens] for tokens in example_tokens]
+                if not all(any(contains_phrase(tokens, phrase) for tokens in example_tokens)
+                           for phrase in phrases):
+                    continue
+            result = self.build_result(entry_id, direction)
+            result['score'] = round(-rank, 3)
+            results.append(result)
+
+        logger.info(f"Found {len(results)} example matches for query: {query}")
+        return results
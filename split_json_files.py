@@ -1,8 +1,111 @@
 import json
 import os
+import re
 import shutil
 from datetime import datetime
 
+# Characters skipped between JSON tokens
+WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+class JsonStreamReader:
+    """
+    Reads JSON tokens and values from a text file a chunk at a time.
+    Only the value being decoded and the unread part of one chunk are kept
+    in memory, whatever the size of the file.
+    """
+    def __init__(self, f, chunk_size=1024 * 1024):
+        self.file = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self, size):
+        """Drop the consumed text and read until size characters are buffered or the file ends."""
+        self.buffer = self.buffer[self.pos:]
+        self.pos = 0
+        while len(self.buffer) < size and not self.eof:
+            chunk = self.file.read(max(self.chunk_size, size - len(self.buffer)))
+            if chunk:
+                self.buffer += chunk
+            else:
+                self.eof = True
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it, or "" at the end."""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or self.eof:
+                return self.buffer[self.pos:self.pos + 1]
+            self.fill(self.chunk_size)
+
+    def take(self):
+        """Consume and return the next non-whitespace character."""
+        char = self.peek()
+        self.pos += len(char)
+        return char
+
+    def decode(self):
+        """Decode the next JSON value."""
+        self.peek()  # raw_decode doesn't skip leading whitespace
+        size = self.chunk_size
+        while True:
+            if len(self.buffer) - self.pos < size:
+                self.fill(size)
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                end = None
+            # A value ending with the buffer may continue (e.g. a number), so read on
+            if end is not None and (end < len(self.buffer) or self.eof):
+                self.pos = end
+                return value
+            size = 2 * (len(self.buffer) - self.pos)
+
+    def expect(self, expected):
+        char = self.take()
+        if char not in expected:
+            raise ValueError(f"Expected {' or '.join(map(repr, expected))} but found {char!r} "
+                             f"in JSON input")
+        return char
+
+def iter_json_entries(input_file, chunk_size=1024 * 1024):
+    """
+    Yield the entries of a JSON array file one at a time, without loading the file.
+    Nested arrays are flattened one level deep: their items are yielded as entries.
+    """
+    with open(input_file, 'r', encoding='utf-8') as f:
+        reader = JsonStreamReader(f, chunk_size)
+        reader.expect("[")
+        if reader.peek() == "]":
+            return
+        index = 0
+        while True:
+            if reader.peek() == "[":
+                # Flatten the nested array structure
+                reader.take()
+                if reader.peek() == "]":
+                    reader.take()
+                else:
+                    while True:
+                        yield reader.decode()
+                        if reader.expect(",]") == "]":
+                            break
+            else:
+                yield reader.decode()
+            index += 1
+            if index % 100 == 0:
+                print(f"[DEBUG] Read {index} top-level entries...")
+            if reader.expect(",]") == "]":
+                break
+
+def format_entry(entry):
+    """Serialize an entry the way json.dump(chunk, indent=2) lays out array items."""
+    return "  " + json.dumps(entry, ensure_ascii=False, indent=2).replace("\n", "\n  ")
+
 def split_json_file(input_file, max_size_mb=90):
     # Create backup directory if it doesn't exist
     backup_dir = "backups"
@@ -15,62 +118,51 @@ def split_json_file(input_file, max_size_mb=90):
     shutil.copy2(input_file, backup_file)
     print(f"[INFO] Created backup: {backup_file}")
     
-    # Read the original JSON file
-    print(f"[INFO] Loading JSON data from {input_file}...")
-    with open(input_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    print(f"[INFO] Loaded JSON file with {len(data)} top-level entries.")
-    
-    # Flatten the nested array structure
-    print(f"[INFO] Flattening nested array structure...")
-    flattened_data = []
-    for idx, subarray in enumerate(data):
-        if isinstance(subarray, list):
-            flattened_data.extend(subarray)
-        else:
-            flattened_data.append(subarray)
-        if idx % 100 == 0:
-            print(f"[DEBUG] Flattened {idx+1} top-level entries...")
-    print(f"[INFO] Total flattened entries: {len(flattened_data)}")
-    
-    # Calculate chunk size (90MB to be safe)
+    # Every part file, brackets included, stays within max_size_bytes (90MB to be safe)
     max_size_bytes = max_size_mb * 1024 * 1024
+    opening, separator, closing = b"[\n", b",\n", b"\n]"
     
-    # Split into chunks
-    print(f"[INFO] Splitting data into chunks of ~{max_size_mb}MB...")
-    chunks = []
-    current_chunk = []
-    current_size = 0
-    
-    for i, entry in enumerate(flattened_data, 1):
-        entry_str = json.dumps(entry, ensure_ascii=False)
-        entry_size = len(entry_str.encode('utf-8'))
-        
-        if current_size + entry_size > max_size_bytes:
-            chunks.append(current_chunk)
-            print(f"[DEBUG] Created chunk {len(chunks)} with {len(current_chunk)} entries.")
-            current_chunk = [entry]
-            current_size = entry_size
-        else:
-            current_chunk.append(entry)
-            current_size += entry_size
-        if i % 1000 == 0:
-            print(f"[DEBUG] Processed {i} entries...")
-    
-    if current_chunk:
-        chunks.append(current_chunk)
-        print(f"[DEBUG] Created chunk {len(chunks)} with {len(current_chunk)} entries.")
-    
-    # Save chunks
+    # Stream the entries of the nested arrays straight into the part files; each
+    # entry is serialized once and a new part is started when it wouldn't fit
+    print(f"[INFO] Streaming entries from {input_file} into parts of at most {max_size_mb}MB...")
     base_name = os.path.splitext(input_file)[0]
-    for i, chunk in enumerate(chunks, 1):
-        output_file = f"{base_name}_part{i}.json"
-        print(f"[INFO] Saving chunk {i} to {output_file} ({len(chunk)} entries)...")
-        with open(output_file, 'w', encoding='utf-8') as f:
-            json.dump(chunk, f, ensure_ascii=False, indent=2)
-        print(f"[INFO] Created chunk {i}: {output_file} ({len(chunk)} entries)")
+    part = None
+    output_file = None  # path of the open part
+    parts = 0
+    part_size = part_entries = 0
+    try:
+        for i, entry in enumerate(iter_json_entries(input_file), 1):
+            entry_bytes = format_entry(entry).encode('utf-8')
+            if part is not None and part_size + len(separator) + len(entry_bytes) + len(closing) > max_size_bytes:
+                part.write(closing)
+                part.close()
+                print(f"[INFO] Created chunk {parts}: {output_file} ({part_entries} entries, {part_size + len(closing)} bytes)")
+                part = None
+            if part is None:
+                parts += 1
+                output_file = f"{base_name}_part{parts}.json"
+                part = open(output_file, 'wb')
+                part.write(opening)
+                part_size, part_entries = len(opening), 0
+            elif part_entries:
+                part.write(separator)
+                part_size += len(separator)
+            if len(opening) + len(entry_bytes) + len(closing) > max_size_bytes:
+                print(f"[WARNING] Entry {i} alone exceeds {max_size_mb}MB; writing it to a part of its own")
+            part.write(entry_bytes)
+            part_size += len(entry_bytes)
+            part_entries += 1
+            if i % 1000 == 0:
+                print(f"[DEBUG] Processed {i} entries...")
+    
+        if part is not None:
+            part.write(closing)
+            print(f"[INFO] Created chunk {parts}: {output_file} ({part_entries} entries, {part_size + len(closing)} bytes)")
+    finally:
+        if part is not None:
+            part.close()
     
-    return len(chunks)
+    return parts
 
 def main():
     # Find all large JSON files